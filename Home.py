@@ -4,15 +4,18 @@ import pandas as pd
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
-from services.fpl_service import fetch_all_league_standings, fetch_bootstrap_static
 from services.lps import elimination_schedule, participants_left_after_gw
+from services.season_clock import season_clock
+from services.shared_data import league_standings
 from services.articles import article_url, format_article_date, load_articles
+from services.cache_warmer import start_cache_warmer
 from utils import add_logo_fixed
 from config import LEAGUE_ID
 
 st.set_page_config(page_title="Big Whammy - Home", layout="wide")
 
 add_logo_fixed("TBWlogo.png", width=120, top=20, left=16)
+start_cache_warmer(LEAGUE_ID)
 
 st.title("🏡 Welcome to The Big Whammy!")
 
@@ -23,15 +26,14 @@ Track your weekly awards 🏆, eliminations ❌, and overall table 📊 all in o
 
 # League summary
 with st.spinner("Fetching league summary…"):
-    standings = fetch_all_league_standings(LEAGUE_ID)
+    standings = league_standings(LEAGUE_ID)
 
 st.subheader("📊 League Summary")
 st.write(f"**Total Managers:** {len(standings)}")
 
 # --- LPS schedule summary ---
-bs = fetch_bootstrap_static()
-events = bs.get("events", []) or []
-season_finished = max((event.get("id", 0) for event in events if event.get("finished")), default=0) >= 38
+clock = season_clock()
+season_finished = clock.season_finished
 
 leader_label = "Winner" if season_finished else "Current Leader"
 points_label = "Winning Points" if season_finished else "Leader Points"
@@ -40,11 +42,7 @@ st.write(f"**{points_label}:** {standings[0]['total']}")
 
 # find next GW with eliminations (after latest completed GW)
 now_utc = datetime.now(timezone.utc)
-current_gw = None
-for ev in events:
-    if ev.get("finished"):
-        current_gw = ev["id"]
-next_gw = (current_gw or 0) + 1
+next_gw = clock.latest_finished_gw + 1
 
 if next_gw <= 38 and elimination_schedule(next_gw) > 0:
     st.write(f"**LPS Schedule:** {elimination_schedule(next_gw)} eliminations in GW {next_gw}")
@@ -76,18 +74,10 @@ with st.expander("View full LPS elimination schedule"):
 
 # --- Next Deadline (IST) ---
 try:
-    next_event = None
-    for ev in events:
-        dt_str = ev.get("deadline_time")
-        if not dt_str:
-            continue
-        dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-        if dt > now_utc:
-            next_event = ev
-            break
+    next_event = clock.next_deadline_event(now_utc)
 
     if next_event:
-        dt_utc = datetime.fromisoformat(next_event["deadline_time"].replace("Z", "+00:00"))
+        dt_utc = next_event.deadline
         dt_ist = dt_utc.astimezone(ZoneInfo("Asia/Kolkata"))
         ist_str = dt_ist.strftime("%a, %d %b %Y • %I:%M %p IST")
 
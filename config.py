@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 LEAGUE_ID = 1124151
@@ -6,4 +7,31 @@ IRON_MAN_BASE_GW = 19
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 SNAPSHOT_DB_PATH = DATA_DIR / "big_whammy_snapshots.sqlite3"
+HTTP_CACHE_DB_PATH = DATA_DIR / "fpl_http_cache.sqlite3"
+LEDGER_DB_PATH = DATA_DIR / "winners_ledger.sqlite3"
 ARTICLES_DIR = BASE_DIR / "articles"
+
+# FPL API client
+FPL_MAX_WORKERS = 8  # thread pool size for batched per-entry fetches
+FPL_RATE_PER_SEC = 10.0  # sustained request rate shared by every fetch_* call
+FPL_BURST = 20  # requests allowed back-to-back before the rate applies
+FPL_MAX_CONCURRENCY = 8  # in-flight request ceiling; lowered automatically when FPL pushes back
+FPL_MIN_CONCURRENCY = 1
+FPL_RETRIES = 4
+FPL_BACKOFF_BASE = 1.0  # seconds; doubled per retry, with full jitter
+FPL_BACKOFF_MAX = 30.0
+FPL_POOL_SIZE = 16  # keep-alive connections kept open per host
+FPL_POOL_HOSTS = 4  # distinct hosts with a connection pool
+HTTP_CACHE_TTL = 300  # seconds a not-yet-final FPL response is served before revalidating
+FPL_NEGATIVE_TTL = 30  # seconds a failed fetch is answered from memory instead of the network
+FPL_BACKGROUND_RETRIES = 3  # background refetches of a failed URL, FPL_NEGATIVE_TTL apart and growing
+# Background refresh-ahead of the response store (services/cache_warmer.py).
+CACHE_WARMER_ENABLED = os.environ.get("BIG_WHAMMY_CACHE_WARMER", "").lower() in {"1", "true", "yes"}
+WARM_LIVE_INTERVAL = 120  # seconds between passes while a GW is live
+WARM_IDLE_INTERVAL = 240  # seconds between passes otherwise; kept below HTTP_CACHE_TTL so idle pages never miss
+# Serve FPL data only from the local response store (see scripts/ingest_season.py).
+FPL_OFFLINE = os.environ.get("BIG_WHAMMY_OFFLINE", "").lower() in {"1", "true", "yes"}
+
+# Winners ledger storage: "json" (the ledger file only) or "sqlite" (the file
+# plus an indexed store that the Winners' Tally page queries).
+LEDGER_BACKEND = os.environ.get("BIG_WHAMMY_LEDGER_BACKEND", "json").lower()
@@ -2,7 +2,7 @@
 import streamlit as st
 import pandas as pd
 
-from services.fpl_service import fetch_all_league_standings
+from services.shared_data import league_standings
 from utils import add_logo_fixed
 from config import LEAGUE_ID
 
@@ -29,7 +29,7 @@ def season_award(rank: int) -> str:
 
 # Fetch all league standings (all pages)
 with st.spinner("Loading full league standings…"):
-    standings = fetch_all_league_standings(LEAGUE_ID)
+    standings = league_standings(LEAGUE_ID)
 
 # Build DataFrame
 df = pd.DataFrame([{
@@ -1,14 +1,12 @@
 # pages/2_Gameweek_Slammers.py
 import streamlit as st
-import pandas as pd
-from typing import List, Dict, Any
-
-from services.fpl_service import (
-    fetch_all_league_standings,
-    fetch_entry_event_picks,
-    compute_net_points,
-    fetch_bootstrap_static,
-)
+
+from services.fpl_service import FetchError
+from services.live_scoring import live_scores, with_live_gw
+from services.points_matrix import season_points_matrix
+from services.slammers import gameweek_matrix, gameweek_table, unscored_entries
+from services.season_clock import season_clock
+from services.shared_data import league_standings, missing_managers
 from utils import add_logo_fixed
 from config import LEAGUE_ID
 
@@ -20,18 +18,13 @@ st.title("🏆 Gameweek Slammers")
 # Gameweek selector
 gw = st.selectbox("Select Gameweek", list(range(1, 39)), index=0)
 
-# Determine latest completed GW via bootstrap-static
-latest_completed_gw = 0
-try:
-    bs = fetch_bootstrap_static()
-    events = bs.get("events", []) or []
-    latest_completed_gw = max((e.get("id", 0) for e in events if e.get("finished")), default=0)
-except Exception:
-    # If bootstrap fails, assume no GWs completed (defensive)
-    latest_completed_gw = 0
+# Determine latest completed GW (and any GW in play) from the shared season clock
+clock = season_clock()
+latest_completed_gw = clock.latest_finished_gw
+is_live = gw == clock.live_gw
 
 # If selected GW is in the future, show fun message and skip fetching
-if gw > latest_completed_gw:
+if gw > latest_completed_gw and not is_live:
     st.header(f"Gameweek {gw} — not yet completed")
     st.markdown(
         """
@@ -43,95 +36,48 @@ if gw > latest_completed_gw:
     st.markdown("> _Oi, even Pep doesn’t rotate this early._ ⚽️")
     st.stop()  # stops the rest of the page from executing
 
-# If we reach here, the selected GW is completed — proceed with normal logic
+# If we reach here, the selected GW is completed or in play — proceed with normal logic
 with st.spinner("Loading managers…"):
-    standings = fetch_all_league_standings(LEAGUE_ID)
+    standings = league_standings(LEAGUE_ID)
 
-rows: List[Dict[str, Any]] = []
 with st.spinner(f"Fetching Gameweek {gw} points…"):
-    for m in standings:
-        entry_id = int(m["entry"])
-        picks = fetch_entry_event_picks(entry_id, gw)
-        pts = compute_net_points(picks)  # dict: raw_points, minus_points, net_points
-
-        rows.append({
-            "entry": entry_id,
-            "Manager": m.get("player_name", ""),
-            "Team": m.get("entry_name", ""),
-            "GWPoints": int(pts.get("net_points", 0)),   # keep using final (net) points
-            "TotalPoints": int(m.get("total", 0)),
-        })
-
-# Build DataFrame and sort: primary by GWPoints desc, then TotalPoints desc
-df = pd.DataFrame(rows).sort_values(by=["GWPoints", "TotalPoints"], ascending=[False, False]).reset_index(drop=True)
-
-# Build groups of ties by GWPoints value preserving order
-groups = []
-i = 0
-n = len(df)
-while i < n:
-    val = df.loc[i, "GWPoints"]
-    j = i
-    indices = []
-    while j < n and df.loc[j, "GWPoints"] == val:
-        indices.append(j)
-        j += 1
-    groups.append({"value": val, "indices": indices, "start_pos": i + 1, "size": len(indices)})
-    i = j
-
-# Prepare medal column (empty by default)
-medal_col = [""] * n
-
-def assign_medal_to_group(group_indices: List[int], emoji: str):
-    for idx in group_indices:
-        medal_col[idx] = emoji
-
-# Assign medals according to rules (with 3+ tie-at-top handling)
-for gi, group in enumerate(groups):
-    start = group["start_pos"]
-    size = group["size"]
-
-    # Tie for 1st (group starts at 1)
-    if start == 1:
-        if size == 1:
-            assign_medal_to_group(group["indices"], "🥇")
-        else:
-            # multiple tied for 1st
-            # Special rule: if 3 or more tied at 1st -> all get gold, silver & bronze skipped
-            if size >= 3:
-                assign_medal_to_group(group["indices"], "🥇")
-                # skip any further medals entirely
-                break
-            else:
-                # size == 2: both get gold; silver skipped; next group (if present) becomes bronze
-                assign_medal_to_group(group["indices"], "🥇")
-                if gi + 1 < len(groups):
-                    next_group = groups[gi + 1]
-                    if next_group["start_pos"] == 3:
-                        assign_medal_to_group(next_group["indices"], "🥉")
-        continue
-
-    # Tie for 2nd (group starts at 2)
-    if start == 2:
-        if size == 1:
-            assign_medal_to_group(group["indices"], "🥈")
-        else:
-            # tie for 2nd -> both get silver; bronze skipped
-            assign_medal_to_group(group["indices"], "🥈")
-        continue
-
-    # Tie for 3rd (group starts at 3)
-    if start == 3:
-        assign_medal_to_group(group["indices"], "🥉")
-        continue
-
-    # groups after position 3 get no medal
+    matrix = season_points_matrix(LEAGUE_ID) if is_live else gameweek_matrix(LEAGUE_ID, gw)
+
+if is_live:
+    with st.spinner(f"Scoring live Gameweek {gw}…"):
+        try:
+            scores = live_scores(LEAGUE_ID, gw)
+        except FetchError:
+            st.error(f"Live data for Gameweek {gw} is unavailable right now. Please try again in a minute.")
+            st.stop()
+    matrix = with_live_gw(matrix, scores)
+    st.info(
+        f"⏱️ Gameweek {gw} is in play — provisional table as of {scores.updated_at:%H:%M} UTC "
+        "(auto-subs applied, bonus only once confirmed). Medals are not final until the GW is."
+    )
+
+if matrix.failed:
+    st.warning(
+        f"Could not fetch points for {len(matrix.failed)} manager(s) "
+        f"({', '.join(missing_managers(LEAGUE_ID, matrix.failed))}); they are marked ⚠️ and left out "
+        "of the medals until a retry succeeds."
+    )
+
+unscored = unscored_entries(matrix, gw)
+if unscored:
+    st.warning(
+        f"The stored history of {len(unscored)} manager(s) "
+        f"({', '.join(missing_managers(LEAGUE_ID, unscored))}) does not reach Gameweek {gw} yet; "
+        "they are marked ⚠️ and no medals are awarded until it does."
+    )
+
+# Sorted by GWPoints desc, then TotalPoints desc, with medals for the top three tie groups
+df = gameweek_table(standings, matrix, gw)
 
 # Final display DataFrame
 df_display = df.copy()
 df_display.index = df_display.index + 1  # 1-based index
 df_display.index.name = "Rank"
-df_display.insert(0, "Medal", medal_col)
 
 # Show columns
 show_cols = ["Medal", "Manager", "Team", "GWPoints", "TotalPoints"]
@@ -2,15 +2,13 @@
 import streamlit as st
 import pandas as pd
 import random
-from typing import Dict, List, Any, Set, Tuple
 
-from services.fpl_service import (
-    fetch_all_league_standings,
-    fetch_entry_event_picks,
-    compute_net_points,
-    fetch_bootstrap_static,
-)
-from services.lps import elimination_schedule, coin_toss_seeded
+from services.fpl_service import FetchError
+from services.live_scoring import live_scores, with_live_gw
+from services.lps import lps_eliminations, lps_survivors, provisional_eliminations, update_lps_log
+from services.points_matrix import season_points_matrix
+from services.season_clock import season_clock
+from services.shared_data import league_standings, missing_managers
 from utils import add_logo_fixed
 from config import LEAGUE_ID
 
@@ -26,17 +24,13 @@ st.title("🪓 Last Person Standing")
 # Gameweek selector
 selected_gw = st.selectbox("Select Gameweek", options=list(range(1, 39)), index=0)
 
-# Determine latest completed GW using bootstrap-static
-latest_completed_gw = 0
-try:
-    bs = fetch_bootstrap_static()
-    events = bs.get("events", []) or []
-    latest_completed_gw = max((e.get("id", 0) for e in events if e.get("finished")), default=0)
-except Exception:
-    latest_completed_gw = 0
+# Determine latest completed GW (and any GW in play) from the shared season clock
+clock = season_clock()
+latest_completed_gw = clock.latest_finished_gw
+is_live = selected_gw == clock.live_gw
 
 # If user selected a future GW, show playful message and STOP (prevent computing eliminations)
-if selected_gw > latest_completed_gw:
+if selected_gw > latest_completed_gw and not is_live:
     roasts = [
         "Don't get ahead of yourself — the transfer fairy hasn't ticked the boxes yet!",
         "Calm down, Pep hasn’t even benched your captain yet.",
@@ -57,136 +51,92 @@ if selected_gw > latest_completed_gw:
 
 # Fetch full standings (all pages)
 with st.spinner("Loading league standings…"):
-    standings = fetch_all_league_standings(LEAGUE_ID)
+    standings = league_standings(LEAGUE_ID)
     idx_by_entry = {row["entry"]: row for row in standings}
 
-# Initial survivor set = everyone present in standings
-initial_survivors: Set[int] = set(idx_by_entry.keys())
+def show_danger_zone(gw: int, matrix, heading: str, note: str) -> None:
+    """
+    Who would go out in `gw` on the given (provisional) points; nothing is stored.
+    """
+    danger, standing = provisional_eliminations(LEAGUE_ID, gw, standings, matrix)
+
+    st.subheader(f"Gameweek {gw} — {heading}")
+    st.info(note)
+    if matrix.failed:
+        st.warning(
+            f"Could not fetch points for {len(matrix.failed)} manager(s) "
+            f"({', '.join(missing_managers(LEAGUE_ID, matrix.failed))}); they are left out of the "
+            "danger zone until a retry succeeds."
+        )
+    if not danger:
+        st.info(f"No eliminations scheduled this week (GW {gw}).")
+    else:
+        danger_df = pd.DataFrame(danger)
+        danger_df.insert(0, "Elim #", range(1, len(danger_df) + 1))
+        st.dataframe(
+            danger_df[["Elim #", "Manager", "Team", "RawPoints", "MinusPoints", "NetPoints", "OverallRank"]].rename(
+                columns={
+                    "RawPoints": "Points",
+                    "MinusPoints": "Minus Points",
+                    "NetPoints": "Net Points",
+                    "OverallRank": "Overall Rank",
+                }
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+    st.write(f"**Managers still standing going into GW {gw}: {len(standing)}**")
+
 
+# Bring the stored elimination log up to date. Only GWs whose points FPL has
+# confirmed (finished and data checked) are stored; later ones are provisional.
+with st.spinner("Updating eliminations…"):
+    matrix = season_points_matrix(LEAGUE_ID)
+    computed_through = update_lps_log(LEAGUE_ID, latest_completed_gw, standings, matrix)
 
-@st.cache_data(ttl=600, show_spinner=False)
-def gw_snapshot(
-    league_id: int, gw: int, entries: List[int], idx_map: Dict[int, Dict[str, Any]]
-) -> pd.DataFrame:
-    rows = []
-    for entry_id in entries:
+provisional = selected_gw == computed_through + 1 and (is_live or not clock.is_final(selected_gw))
+
+if provisional and is_live:
+    with st.spinner(f"Scoring live Gameweek {selected_gw}…"):
         try:
-            picks = fetch_entry_event_picks(entry_id, gw)
-            pts = compute_net_points(picks)
-            s = idx_map.get(entry_id, {})  # overall snapshot
-
-            rows.append({
-                "entry": entry_id,
-                "Manager": s.get("player_name", ""),
-                "Team": s.get("entry_name", ""),
-                "OverallRank": int(s.get("rank", 10**9)),
-                "OverallPoints": int(s.get("total", 0)),
-                "RawPoints": int(pts.get("raw_points", 0)),
-                "MinusPoints": int(pts.get("minus_points", 0)),
-                "NetPoints": int(pts.get("net_points", 0)),
-            })
-        except Exception as e:
-            # Prevent one bad entry from killing everything
-            print(f"⚠️ Error for entry {entry_id}, GW {gw}: {e}")
-
-    if not rows:
-        return pd.DataFrame(columns=[
-            "entry", "Manager", "Team", "OverallRank",
-            "OverallPoints", "RawPoints", "MinusPoints", "NetPoints"
-        ])
-
-    return pd.DataFrame(rows)
-
-
-# Run cumulative eliminations from GW1 → selected_gw
-elimination_log: Dict[int, List[Dict[str, Any]]] = {}
-survivors: Set[int] = set(initial_survivors)
-
-for gw in range(1, selected_gw + 1):
-    n_elim = elimination_schedule(gw)
-    if n_elim == 0 or len(survivors) <= 1:
-        elimination_log[gw] = []
-        continue
-
-    entries = list(survivors)
-    df = gw_snapshot(LEAGUE_ID, gw, entries, idx_by_entry)
-
-    if df is None or df.empty:
-        elimination_log[gw] = []
-        continue  # skip this GW safely
-
-    # Base sort (who is at the bottom):
-    df = df.sort_values(
-        by=["NetPoints", "OverallRank", "MinusPoints"],
-        ascending=[True, True, False],
-    ).reset_index(drop=True)
-
-    # Determine bottom block including ties on NetPoints threshold
-    if n_elim >= len(df):
-        bottom_block = df.copy()
-    else:
-        threshold = df.iloc[n_elim - 1]["NetPoints"]
-        bottom_block = df[df["NetPoints"] <= threshold].copy()
-
-    # Strict outs
-    strict_out = bottom_block[
-        bottom_block["NetPoints"] < bottom_block["NetPoints"].max()
-    ].copy()
-    remaining_slots = max(0, n_elim - len(strict_out))
-
-    # Tied group
-    tied_group = bottom_block[
-        bottom_block["NetPoints"] == bottom_block["NetPoints"].max()
-    ].copy()
-
-    eliminated_rows: List[pd.Series] = []
-    for _, r in strict_out.iterrows():
-        eliminated_rows.append(r)
-
-    if remaining_slots > 0 and len(tied_group) > 0:
-        tied_group = tied_group.sort_values(
-            by=["OverallRank", "MinusPoints"],
-            ascending=[False, False],
-        ).reset_index(drop=True)
-
-        if remaining_slots < len(tied_group):
-            shuffled = coin_toss_seeded(list(tied_group.to_dict("records")), gw)
-            tied_group = pd.DataFrame(shuffled)
-
-        eliminated_rows.extend(
-            [tied_group.iloc[i] for i in range(min(remaining_slots, len(tied_group)))]
-        )
+            scores = live_scores(LEAGUE_ID, selected_gw)
+        except FetchError:
+            st.error(f"Live data for GW {selected_gw} is unavailable right now. Please try again in a minute.")
+            st.stop()
+        live_matrix = with_live_gw(matrix, scores)
+    show_danger_zone(
+        selected_gw,
+        live_matrix,
+        "Danger Zone (live)",
+        f"⏱️ GW {selected_gw} is in play — provisional as of {scores.updated_at:%H:%M} UTC "
+        "(auto-subs applied, bonus only once confirmed). Nobody is out until the GW is finished.",
+    )
+    st.stop()
 
-    # Apply eliminations (recalculate to avoid stale/mislabelled data)
-    eliminated_entries = []
-    for r in eliminated_rows:
-        entry_id = int(r["entry"])
-        if entry_id in survivors:
-            survivors.remove(entry_id)
-            # Fetch fresh GW data to guarantee correct Raw/Net/Minus
-            picks = fetch_entry_event_picks(entry_id, gw)
-            pts = compute_net_points(picks)
-
-            eliminated_entries.append(
-                {
-                    "entry": entry_id,
-                    "Manager": r["Manager"],
-                    "Team": r["Team"],
-                    "RawPoints": int(pts.get("raw_points", 0)),       # before hits
-                    "MinusPoints": int(pts.get("minus_points", 0)),   # hits
-                    "NetPoints": int(pts.get("net_points", 0)),       # after hits
-                    "OverallPoints": int(r["OverallPoints"]),
-                    "OverallRank": int(r["OverallRank"]),
-                }
-            )
+if provisional:
+    show_danger_zone(
+        selected_gw,
+        matrix,
+        "Danger Zone (provisional)",
+        f"GW {selected_gw} is finished but FPL has not confirmed its points yet (bonus and corrections "
+        "can still change). Eliminations are stored once it does.",
+    )
+    st.stop()
+
+if computed_through < selected_gw:
+    st.warning(
+        f"Eliminations are only available through GW {computed_through} right now — "
+        "some managers' points could not be fetched or are not confirmed yet. Try again shortly."
+    )
+    st.stop()
 
-    elimination_log[gw] = eliminated_entries
+gw_elims = lps_eliminations(LEAGUE_ID, selected_gw)
+survivors = lps_survivors(LEAGUE_ID, selected_gw, list(idx_by_entry.keys()))
 
 
 # ------- UI for selected GW -------
 st.subheader(f"Gameweek {selected_gw} — Eliminations")
 
-gw_elims = elimination_log.get(selected_gw, [])
 if not gw_elims:
     st.info(f"No eliminations this week (GW {selected_gw}).")
 else:
@@ -219,9 +169,8 @@ else:
 
 
 # Survivors after selected GW
-survivor_entries = list(survivors)
 survivor_rows = []
-for e in survivor_entries:
+for e in survivors:
     s = idx_by_entry.get(e, {})
     survivor_rows.append(
         {
@@ -1,94 +1,81 @@
 import streamlit as st
-import pandas as pd
 
 from config import IRON_MAN_BASE_GW, LEAGUE_ID
-from services.fpl_service import fetch_bootstrap_static
-from services.snapshots import get_or_capture_league_rank_snapshot
+from services.ranking import insert_position
+from services.rank_trajectory import RankTrajectory, load_rank_trajectory, trajectory_version
+from services.season_clock import season_clock
+from services.shared_data import freeze_array
+from services.snapshots import backfill_league_rank_snapshots
 from utils import add_logo_fixed
 
 st.set_page_config(page_title="Iron Man Award", layout="wide")
 add_logo_fixed("TBWlogo.png", width=120, top=20, left=16)
 
 st.title("💪 Iron Man Award")
-st.caption("Biggest official Big Whammy rank climber from GW19 to the latest completed GW")
+st.caption("Biggest official Big Whammy rank climber from GW19 to the latest confirmed GW")
 
-bs = fetch_bootstrap_static()
-events = bs.get("events", []) or []
-latest_gw = max((e.get("id", 0) for e in events if e.get("finished")), default=0)
+# Snapshots are stored only for GWs FPL has confirmed (bonus and corrections in).
+latest_gw = season_clock().latest_final_gw
 
-if latest_gw < IRON_MAN_BASE_GW:
-    st.warning("Iron Man race begins after Gameweek 19.")
+if latest_gw < 2:
+    st.warning("Rank movement needs at least two confirmed gameweeks.")
     st.stop()
 
+
+# One read-only trajectory per snapshot version, shared by every session.
+@st.cache_resource(ttl=600, max_entries=4, show_spinner=False)
+def cached_trajectory(league_id: int, version: tuple) -> RankTrajectory:
+    trajectory = load_rank_trajectory(league_id)
+    for values in (trajectory.entries, trajectory.ranks, trajectory.totals):
+        freeze_array(values)
+    return trajectory
+
+
 force_refresh = st.button("Refresh official snapshots")
+trajectory = cached_trajectory(LEAGUE_ID, trajectory_version(LEAGUE_ID))
+if force_refresh or len(trajectory.gws) < latest_gw:
+    with st.spinner("Rebuilding official Big Whammy rank snapshots…"):
+        backfill_league_rank_snapshots(LEAGUE_ID)
+    trajectory = cached_trajectory(LEAGUE_ID, trajectory_version(LEAGUE_ID))
 
-with st.spinner(f"Loading official Big Whammy ranks after GW{IRON_MAN_BASE_GW}…"):
-    base_snapshot = get_or_capture_league_rank_snapshot(
-        LEAGUE_ID,
-        IRON_MAN_BASE_GW,
-        force_refresh=force_refresh,
-    )
-
-with st.spinner(f"Loading official Big Whammy ranks after GW{latest_gw}…"):
-    current_snapshot = get_or_capture_league_rank_snapshot(
-        LEAGUE_ID,
-        latest_gw,
-        force_refresh=force_refresh,
-    )
-
-if not base_snapshot:
-    st.error(f"No official snapshot found for GW{IRON_MAN_BASE_GW}.")
+if not trajectory.has_gw(latest_gw):
+    st.error(f"No official snapshot found for GW{latest_gw}.")
     st.stop()
 
-if not current_snapshot:
-    st.error(f"No official snapshot found for GW{latest_gw}.")
+base_options = [gw for gw in trajectory.gws if gw < latest_gw]
+if not base_options:
+    st.error("No earlier official snapshots found to compare against.")
     st.stop()
 
-base_by_entry = {int(row["entry"]): row for row in base_snapshot}
-current_by_entry = {int(row["entry"]): row for row in current_snapshot}
-
-rows = []
-for entry, base_row in base_by_entry.items():
-    current_row = current_by_entry.get(entry)
-    if not current_row:
-        continue
-
-    start_rank = int(base_row["rank"])
-    current_rank = int(current_row["rank"])
-    rank_gain = start_rank - current_rank
-
-    rows.append(
-        {
-            "Manager": current_row.get("player_name") or base_row.get("player_name", ""),
-            "Team": current_row.get("entry_name") or base_row.get("entry_name", ""),
-            "Rank After GW19": start_rank,
-            f"Rank After GW{latest_gw}": current_rank,
-            "Rank Gain": rank_gain,
-            "Current Points": int(current_row.get("total", 0)),
-        }
-    )
-
-if not rows:
-    st.error("No matching managers found between the GW19 and current official snapshots.")
+default_base = IRON_MAN_BASE_GW if IRON_MAN_BASE_GW in base_options else base_options[0]
+base_gw = st.selectbox(
+    "Measure rank gain from",
+    base_options,
+    index=base_options.index(default_base),
+    format_func=lambda gw: f"GW{gw}",
+)
+
+if latest_gw < IRON_MAN_BASE_GW:
+    st.info("Iron Man race begins after Gameweek 19. Until then, explore rank movement from any earlier gameweek.")
+elif base_gw != IRON_MAN_BASE_GW:
+    st.info(f"The Iron Man award is measured from GW{IRON_MAN_BASE_GW}; GW{base_gw} is shown for comparison only.")
+
+start_col = f"Rank After GW{base_gw}"
+end_col = f"Rank After GW{latest_gw}"
+df = trajectory.movement_table(base_gw, latest_gw).rename(
+    columns={"Start Rank": start_col, "End Rank": end_col}
+)
+
+if df.empty:
+    st.error(f"No matching managers found between the GW{base_gw} and current official snapshots.")
     st.stop()
 
-df = pd.DataFrame(rows).sort_values(
-    by=["Rank Gain", f"Rank After GW{latest_gw}"],
+df = df.sort_values(
+    by=["Rank Gain", end_col],
     ascending=[False, True],
 ).reset_index(drop=True)
 
-positions = []
-current_pos = 1
-for i, row in df.iterrows():
-    if i == 0:
-        positions.append(current_pos)
-    elif row["Rank Gain"] == df.loc[i - 1, "Rank Gain"]:
-        positions.append(current_pos)
-    else:
-        current_pos = i + 1
-        positions.append(current_pos)
-
-df.insert(0, "Position", positions)
+df = insert_position(df, ["Rank Gain"])
 
 
 def medal(position: int) -> str:
@@ -108,8 +95,8 @@ st.dataframe(
             "",
             "Manager",
             "Team",
-            "Rank After GW19",
-            f"Rank After GW{latest_gw}",
+            start_col,
+            end_col,
             "Rank Gain",
             "Current Points",
         ]
@@ -118,11 +105,25 @@ st.dataframe(
     hide_index=True,
 )
 
-captured_at_values = [
-    row.get("captured_at") for row in current_snapshot if row.get("captured_at")
-]
-if captured_at_values:
-    st.caption(f"Current snapshot saved: {max(captured_at_values)}")
+with st.expander(f"Biggest climbers and fallers, GW{base_gw} to GW{latest_gw}"):
+    climb_col, fall_col = st.columns(2)
+    movement_cols = ["Manager", "Team", "Start Rank", "End Rank", "Rank Gain"]
+    with climb_col:
+        st.dataframe(
+            trajectory.best_climbs(base_gw, latest_gw, 5)[movement_cols],
+            use_container_width=True,
+            hide_index=True,
+        )
+    with fall_col:
+        st.dataframe(
+            trajectory.worst_climbs(base_gw, latest_gw, 5)[movement_cols],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+_, captured_at = trajectory_version(LEAGUE_ID)
+if captured_at:
+    st.caption(f"Current snapshot saved: {captured_at}")
 
 st.markdown(
     """
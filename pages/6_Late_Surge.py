@@ -1,8 +1,9 @@
 import streamlit as st
 
 from config import LEAGUE_ID
-from services.awards import LATE_SURGE_GWS, late_surge_table
-from services.fpl_service import fetch_bootstrap_static
+from services.awards import LATE_SURGE_GWS, late_surge_table, missing_entries
+from services.season_clock import season_clock
+from services.shared_data import missing_managers
 from utils import add_logo_fixed
 
 st.set_page_config(page_title="Late Surge Award", layout="wide")
@@ -11,9 +12,7 @@ add_logo_fixed("TBWlogo.png", width=120, top=20, left=16)
 st.title("🚀 Late Surge Award")
 st.caption("Biggest combined net-points haul across GW34-GW38.")
 
-bs = fetch_bootstrap_static()
-events = bs.get("events", []) or []
-latest_completed_gw = max((event.get("id", 0) for event in events if event.get("finished")), default=0)
+latest_completed_gw = season_clock().latest_finished_gw
 completed_late_gws = [gw for gw in LATE_SURGE_GWS if gw <= latest_completed_gw]
 
 if not completed_late_gws:
@@ -31,6 +30,13 @@ else:
 with st.spinner("Calculating Late Surge standings…"):
     df = late_surge_table(LEAGUE_ID, latest_completed_gw)
 
+missing = missing_entries(LEAGUE_ID)
+if missing:
+    st.warning(
+        f"Could not fetch data for {len(missing)} manager(s) ({', '.join(missing_managers(LEAGUE_ID, missing))}); "
+        "they are left out of this table until a retry succeeds."
+    )
+
 if df.empty:
     st.info("No Late Surge data available yet.")
     st.stop()
@@ -3,7 +3,7 @@ import streamlit as st
 
 from config import LEAGUE_ID
 from services.awards import knockout_cup_rows
-from services.fpl_service import fetch_league_cup_status
+from services.fpl_service import FetchError, fetch_league_cup_status
 from utils import add_logo_fixed
 
 st.set_page_config(page_title="Knockout Cup", layout="wide")
@@ -12,7 +12,11 @@ add_logo_fixed("TBWlogo.png", width=120, top=20, left=16)
 st.title("🏆 Knockout Cup")
 st.caption("Mirrors the official FPL Knockout Cup results for The Big Whammy.")
 
-cup_status = fetch_league_cup_status(LEAGUE_ID)
+try:
+    cup_status = fetch_league_cup_status(LEAGUE_ID)
+except FetchError:
+    st.error("Could not reach FPL for the Knockout Cup. Please try again in a minute.")
+    st.stop()
 cup_name = cup_status.get("name", "The Big Whammy Cup")
 cup_league_id = cup_status.get("league")
 
@@ -21,7 +25,11 @@ if cup_league_id:
     st.write(f"**Official FPL Cup League ID:** {cup_league_id}")
 
 with st.spinner("Loading official FPL cup results…"):
-    rows = knockout_cup_rows(LEAGUE_ID)
+    try:
+        rows = knockout_cup_rows(LEAGUE_ID)
+    except FetchError:
+        st.error("Could not load the cup matches from FPL. Please try again in a minute.")
+        st.stop()
 
 if not rows:
     st.info("Knockout Cup results are not available yet from FPL.")
@@ -1,11 +1,16 @@
+import io
+
 import streamlit as st
 
 from services.winners_ledger import (
     ledger_csv,
-    ledger_dataframe,
-    load_winners_ledger,
     printable_ledger_html,
-    totals_dataframe,
+    statement_frame,
+    statement_stem,
+    tally_entries,
+    tally_totals,
+    tally_version,
+    write_statements_zip,
 )
 from utils import add_logo_fixed
 
@@ -15,16 +20,27 @@ add_logo_fixed("TBWlogo.png", width=120, top=20, left=16)
 st.title("🏦 Whammy Coins Ledger")
 st.caption("Final locked winners' tally for The Big Whammy 2025-26.")
 
-ledger = load_winners_ledger()
-df = ledger_dataframe(ledger)
-totals_df = totals_dataframe(ledger)
 
-if df.empty:
+# Cached across sessions; `version` changes whenever the ledger is regenerated.
+@st.cache_data(show_spinner=False)
+def cached_totals(version: str):
+    return tally_totals()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_entries(version: str, manager_team: str | None = None):
+    return tally_entries(manager_team)
+
+
+version = tally_version()
+totals_df = cached_totals(version)
+
+if totals_df.empty:
     st.info("Winners' ledger has not been generated yet.")
     st.stop()
 
-total_wc = int(df["wc"].sum())
-unique_winners = int(df["manager_team"].nunique())
+total_wc = int(totals_df["Total WC"].sum())
+unique_winners = len(totals_df)
 top_row = totals_df.iloc[0]
 
 col1, col2, col3 = st.columns(3)
@@ -38,7 +54,7 @@ selected = st.selectbox("Filter by manager-team", winner_options)
 
 if selected == "All winners":
     st.subheader("All Award Entries")
-    display_df = df.rename(
+    display_df = cached_entries(version).rename(
         columns={
             "manager_team": "Manager-Team",
             "award": "Award",
@@ -57,21 +73,25 @@ if selected == "All winners":
         file_name="big_whammy_winners_ledger_2025_26.csv",
         mime="text/csv",
     )
+
+    if st.button("Prepare every manager's statements (ZIP)"):
+        with st.spinner("Rendering statements…"):
+            archive = io.BytesIO()
+            count = write_statements_zip(archive, cached_entries(version))
+        st.download_button(
+            f"Download {count} statements (CSV + HTML)",
+            data=archive.getvalue(),
+            file_name="big_whammy_statements_2025_26.zip",
+            mime="application/zip",
+        )
 else:
-    filtered = df[df["manager_team"] == selected].copy()
+    filtered = cached_entries(version, selected)
     selected_total = filtered["wc"].sum()
 
     st.subheader(selected)
     st.metric("Total WC Won", f"{int(selected_total):,} WC")
 
-    display_df = filtered.rename(
-        columns={
-            "award": "Award",
-            "detail": "Detail",
-            "position": "Position",
-            "wc": "WC Won",
-        }
-    )[["Award", "Detail", "Position", "WC Won"]]
+    display_df = statement_frame(filtered)
     st.dataframe(display_df, use_container_width=True, hide_index=True)
 
     csv_col, html_col = st.columns(2)
@@ -79,7 +99,7 @@ else:
         st.download_button(
             "Download CSV",
             data=ledger_csv(display_df),
-            file_name=f"{selected.replace(' ', '_').replace('/', '-')}_ledger.csv",
+            file_name=f"{statement_stem(selected)}.csv",
             mime="text/csv",
             use_container_width=True,
         )
@@ -87,7 +107,7 @@ else:
         st.download_button(
             "Download printable HTML",
             data=printable_ledger_html(selected, filtered, selected_total),
-            file_name=f"{selected.replace(' ', '_').replace('/', '-')}_ledger.html",
+            file_name=f"{statement_stem(selected)}.html",
             mime="text/html",
             use_container_width=True,
         )
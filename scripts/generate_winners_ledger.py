@@ -1,3 +1,4 @@
+import argparse
 import sys
 from pathlib import Path
 
@@ -5,12 +6,48 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from services.winners_ledger import LEDGER_PATH, save_winners_ledger
+from services import http_cache
+from services.http_session import session_stats
+from services.winners_ledger import LEDGER_PATH, ledger_dataframe, save_winners_ledger, write_statements_zip
 
 
 def main() -> None:
-    ledger = save_winners_ledger()
+    parser = argparse.ArgumentParser(description="Regenerate the winners ledger JSON.")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Read FPL data only from the local store filled by scripts/ingest_season.py.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every award instead of reusing stages whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--zip",
+        type=Path,
+        metavar="PATH",
+        help="Also write every manager's CSV and HTML statements into this ZIP archive.",
+    )
+    args = parser.parse_args()
+    if args.offline:
+        http_cache.set_offline(True)
+
+    ledger = save_winners_ledger(full_rebuild=args.full)
     print(f"Saved {len(ledger.get('entries', []))} ledger entries to {LEDGER_PATH}")
+    recomputed = ledger.get("recomputed_stages", [])
+    print(f"Recomputed stages: {', '.join(recomputed) if recomputed else 'none'}")
+    print(f"Built in {ledger.get('build_seconds', 0)}s")
+    for stage, seconds in sorted(ledger.get("stage_timings", {}).items(), key=lambda item: -item[1]):
+        print(f"  {stage:<22} {seconds:>7.3f}s")
+    if args.zip:
+        count = write_statements_zip(args.zip, ledger_dataframe(ledger))
+        print(f"Wrote {count} manager statements to {args.zip}")
+    stats = session_stats()
+    print(
+        f"FPL API: {stats['requests']} requests over "
+        f"{stats['connections_opened']} connections (reuse ratio {stats['reuse_ratio']})"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import FPL_MAX_WORKERS, HTTP_CACHE_DB_PATH, LEAGUE_ID
+from services.fpl_service import (
+    fetch_all_league_standings,
+    fetch_bootstrap_static,
+    fetch_entry_event_picks,
+    fetch_entry_history_many,
+    fetch_event_live,
+    fetch_h2h_matches,
+    fetch_league_cup_status,
+)
+from services.http_session import session_stats
+
+
+def _finished_gws(bootstrap: Dict[str, Any]) -> List[int]:
+    return sorted(int(e["id"]) for e in bootstrap.get("events", []) or [] if e.get("finished"))
+
+
+def _run_jobs(jobs: List[Tuple[str, Callable[[], Any]]]) -> List[str]:
+    """
+    Run fetch jobs on the shared-rate-limited pool; return labels of failed jobs.
+    """
+    def run(job: Tuple[str, Callable[[], Any]]) -> str | None:
+        label, fetch = job
+        try:
+            return None if fetch() else label
+        except Exception as e:
+            print(f"⚠️ {label}: {e}")
+            return label
+
+    with ThreadPoolExecutor(max_workers=FPL_MAX_WORKERS) as pool:
+        return [label for label in pool.map(run, jobs) if label]
+
+
+def ingest_season(league_id: int = LEAGUE_ID) -> Dict[str, Any]:
+    """
+    Pull everything the pages and the winners ledger read for the finished
+    gameweeks into the local FPL response store.
+    """
+    started = time.monotonic()
+    bootstrap = fetch_bootstrap_static()
+    finished_gws = _finished_gws(bootstrap)
+    standings = fetch_all_league_standings(league_id)
+    cup_status = fetch_league_cup_status(league_id)
+
+    entry_ids = [int(row["entry"]) for row in standings]
+    histories = fetch_entry_history_many(entry_ids)
+
+    jobs: List[Tuple[str, Callable[[], Any]]] = []
+    finished = set(finished_gws)
+    # Every played GW's picks: chip checks, and the LPS goals tie-breakers,
+    # which may need any survivor's starting XI.
+    for entry_id in entry_ids:
+        history = histories.results.get(entry_id, {})
+        for gw_row in history.get("current", []) or []:
+            gw = int(gw_row.get("event", 0))
+            if gw in finished:
+                jobs.append(
+                    (f"picks {entry_id} GW{gw}", lambda e=entry_id, g=gw: fetch_entry_event_picks(e, g))
+                )
+
+    # Per-player stats (goals scored/conceded) for the tie-breakers.
+    for gw in finished_gws:
+        jobs.append((f"live GW{gw}", lambda g=gw: fetch_event_live(g)))
+
+    cup_league_id = cup_status.get("league")
+    if cup_league_id:
+        for gw in finished_gws:
+            # An empty match list is normal before the cup starts.
+            jobs.append((f"cup GW{gw}", lambda g=gw: fetch_h2h_matches(int(cup_league_id), event=g) or True))
+
+    failed = [f"history {entry_id}" for entry_id in histories.failed]
+    failed.extend(_run_jobs(jobs))
+
+    return {
+        "league_id": league_id,
+        "finished_gws": len(finished_gws),
+        "managers": len(entry_ids),
+        "jobs": len(entry_ids) + len(jobs),
+        "failed": failed,
+        "seconds": round(time.monotonic() - started, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Download all finished-gameweek FPL data into the local response store."
+    )
+    parser.add_argument("--league", type=int, default=LEAGUE_ID)
+    args = parser.parse_args()
+
+    summary = ingest_season(args.league)
+    print(
+        f"Ingested {summary['finished_gws']} finished GWs for {summary['managers']} managers "
+        f"({summary['jobs']} fetches) into {HTTP_CACHE_DB_PATH} in {summary['seconds']}s"
+    )
+    stats = session_stats()
+    print(
+        f"FPL API: {stats['requests']} requests over "
+        f"{stats['connections_opened']} connections (reuse ratio {stats['reuse_ratio']})"
+    )
+    for label in summary["failed"]:
+        print(f"⚠️ Failed: {label}")
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import LEAGUE_ID
+from services.cache_warmer import run_warmer, warm_once
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Keep the local FPL response store warm ahead of expiry (sidecar to the app)."
+    )
+    parser.add_argument("--league", type=int, default=LEAGUE_ID)
+    parser.add_argument("--once", action="store_true", help="Run a single refresh pass and exit.")
+    args = parser.parse_args()
+
+    if args.once:
+        report = warm_once(args.league)
+        print(
+            f"Warmed {report.requests} responses in {report.seconds}s "
+            f"(finished GW{report.latest_finished_gw}, live GW{report.live_gw or '-'})"
+        )
+        if report.delta is not None:
+            print(
+                f"Delta sync: {report.delta.unchanged}/{report.delta.checked} histories unchanged, "
+                f"{len(report.delta.refetched)} refetched"
+            )
+        for url in report.failed:
+            print(f"⚠️ Failed: {url}")
+        sys.exit(1 if report.failed else 0)
+
+    try:
+        run_warmer(args.league)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
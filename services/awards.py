@@ -1,20 +1,40 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
 import pandas as pd
 import streamlit as st
 
 from services.fpl_service import (
-    compute_net_points,
-    fetch_all_league_standings,
+    FetchError,
     fetch_entry_event_picks,
-    fetch_entry_history,
     fetch_h2h_matches,
     fetch_league_cup_status,
 )
+from services.points_matrix import SeasonPointsMatrix, current_points_matrix
+from services.ranking import insert_position
+from services.shared_data import (
+    SHARED_MAX_ENTRIES,
+    DataVersion,
+    current_histories,
+    data_version,
+    freeze_records,
+    league_table,
+)
+
+# Award rows shared between sessions; read-only.
+Records = Tuple[Mapping[str, Any], ...]
 
 LATE_SURGE_GWS = list(range(34, 39))
 
 
+def missing_entries(league_id: int) -> Tuple[int, ...]:
+    """
+    Entries left out of the award tables because their history could not be
+    fetched. Part of every shared award key, so the tables are rebuilt as
+    soon as a background retry recovers one of them.
+    """
+    return tuple(current_points_matrix(league_id, data_version()).failed)
+
+
 def _wildcard_gws_from_history(entry_history: Dict[str, Any], latest_completed_gw: int) -> List[Dict[str, int]]:
     wildcard_gws = []
     for chip in entry_history.get("chips", []) or []:
@@ -34,46 +54,33 @@ def _wildcard_gws_from_history(entry_history: Dict[str, Any], latest_completed_g
     return wildcard_gws
 
 
-def _position_rows(df: pd.DataFrame, rank_cols: List[str]) -> pd.DataFrame:
-    positions = []
-    current_pos = 1
-
-    for i, row in df.iterrows():
-        if i == 0:
-            positions.append(current_pos)
-            continue
-
-        previous = df.loc[i - 1]
-        tied = all(row[col] == previous[col] for col in rank_cols)
-        if tied:
-            positions.append(current_pos)
-        else:
-            current_pos = i + 1
-            positions.append(current_pos)
-
-    output = df.copy()
-    output.insert(0, "Position", positions)
-    return output
-
-
-@st.cache_data(ttl=600, show_spinner=False)
-def wildcard_wizard_rows(league_id: int, latest_completed_gw: int) -> List[Dict[str, Any]]:
-    standings = fetch_all_league_standings(league_id)
+def build_wildcard_wizard_rows(
+    standings: List[Dict[str, Any]],
+    histories: Dict[int, Dict[str, Any]],
+    matrix: SeasonPointsMatrix,
+    latest_completed_gw: int,
+) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
+    missing = set(matrix.failed)
 
     for manager in standings:
         entry_id = int(manager["entry"])
-        entry_history = fetch_entry_history(entry_id)
+        if entry_id in missing:
+            continue
+        entry_history = histories.get(entry_id, {})
         wildcard_gws = _wildcard_gws_from_history(entry_history, latest_completed_gw)
 
         for wildcard in wildcard_gws:
             gw = wildcard["gw"]
-            picks = fetch_entry_event_picks(entry_id, gw)
-            active_chip = (picks.get("active_chip") or "").lower()
+            # Picks are only needed to confirm the chip; points come from the matrix.
+            try:
+                active_chip = (fetch_entry_event_picks(entry_id, gw).get("active_chip") or "").lower()
+            except FetchError:
+                active_chip = ""  # unconfirmed; the history's chip list stands
             if active_chip and active_chip != "wildcard":
                 continue
 
-            points = compute_net_points(picks)
+            points = matrix.points(entry_id, gw)
             rows.append(
                 {
                     "Manager": manager.get("player_name", ""),
@@ -86,8 +93,25 @@ def wildcard_wizard_rows(league_id: int, latest_completed_gw: int) -> List[Dict[
     return rows
 
 
+@st.cache_resource(ttl=600, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _shared_wildcard_wizard_rows(
+    league_id: int, latest_completed_gw: int, version: DataVersion, missing: Tuple[int, ...]
+) -> Records:
+    standings = league_table(league_id, version).rows
+    histories = current_histories(league_id, version).histories
+    matrix = current_points_matrix(league_id, version)
+    return freeze_records(build_wildcard_wizard_rows(standings, histories, matrix, latest_completed_gw))
+
+
+def wildcard_wizard_rows(league_id: int, latest_completed_gw: int) -> Records:
+    return _shared_wildcard_wizard_rows(league_id, latest_completed_gw, data_version(), missing_entries(league_id))
+
+
 def wildcard_wizard_table(league_id: int, latest_completed_gw: int) -> pd.DataFrame:
-    rows = wildcard_wizard_rows(league_id, latest_completed_gw)
+    return wildcard_wizard_frame(wildcard_wizard_rows(league_id, latest_completed_gw))
+
+
+def wildcard_wizard_frame(rows: Sequence[Mapping[str, Any]]) -> pd.DataFrame:
     if not rows:
         return pd.DataFrame()
 
@@ -95,26 +119,27 @@ def wildcard_wizard_table(league_id: int, latest_completed_gw: int) -> pd.DataFr
         by=["Points", "Gameweek", "Manager"],
         ascending=[False, True, True],
     ).reset_index(drop=True)
-    return _position_rows(df, ["Points"])
+    return insert_position(df, ["Points"])
 
 
-@st.cache_data(ttl=600, show_spinner=False)
-def late_surge_rows(league_id: int, latest_completed_gw: int) -> List[Dict[str, Any]]:
-    standings = fetch_all_league_standings(league_id)
+def build_late_surge_rows(
+    standings: List[Dict[str, Any]], matrix: SeasonPointsMatrix, latest_completed_gw: int
+) -> List[Dict[str, Any]]:
     completed_gws = [gw for gw in LATE_SURGE_GWS if gw <= latest_completed_gw]
     rows: List[Dict[str, Any]] = []
 
     if not completed_gws:
         return rows
 
+    missing = set(matrix.failed)
     for manager in standings:
         entry_id = int(manager["entry"])
+        if entry_id in missing:
+            continue
         gw_scores: Dict[int, int] = {}
 
         for gw in completed_gws:
-            picks = fetch_entry_event_picks(entry_id, gw)
-            points = compute_net_points(picks)
-            gw_scores[gw] = int(points["net_points"])
+            gw_scores[gw] = matrix.points(entry_id, gw)["net_points"]
 
         rows.append(
             {
@@ -129,8 +154,26 @@ def late_surge_rows(league_id: int, latest_completed_gw: int) -> List[Dict[str,
     return rows
 
 
+@st.cache_resource(ttl=600, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _shared_late_surge_rows(
+    league_id: int, latest_completed_gw: int, version: DataVersion, missing: Tuple[int, ...]
+) -> Records:
+    if latest_completed_gw < LATE_SURGE_GWS[0]:
+        return ()
+    standings = league_table(league_id, version).rows
+    matrix = current_points_matrix(league_id, version)
+    return freeze_records(build_late_surge_rows(standings, matrix, latest_completed_gw))
+
+
+def late_surge_rows(league_id: int, latest_completed_gw: int) -> Records:
+    return _shared_late_surge_rows(league_id, latest_completed_gw, data_version(), missing_entries(league_id))
+
+
 def late_surge_table(league_id: int, latest_completed_gw: int) -> pd.DataFrame:
-    rows = late_surge_rows(league_id, latest_completed_gw)
+    return late_surge_frame(late_surge_rows(league_id, latest_completed_gw))
+
+
+def late_surge_frame(rows: Sequence[Mapping[str, Any]]) -> pd.DataFrame:
     if not rows:
         return pd.DataFrame()
 
@@ -138,17 +181,17 @@ def late_surge_table(league_id: int, latest_completed_gw: int) -> pd.DataFrame:
         by=["Total Points", "Highest Single GW", "Manager"],
         ascending=[False, False, True],
     ).reset_index(drop=True)
-    return _position_rows(df, ["Total Points", "Highest Single GW"])
+    return insert_position(df, ["Total Points", "Highest Single GW"])
 
 
-@st.cache_data(ttl=600, show_spinner=False)
-def everest_rows(league_id: int, latest_completed_gw: int) -> List[Dict[str, Any]]:
-    standings = fetch_all_league_standings(league_id)
+def build_everest_rows(
+    standings: List[Dict[str, Any]], histories: Dict[int, Dict[str, Any]], latest_completed_gw: int
+) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
 
     for manager in standings:
         entry_id = int(manager["entry"])
-        entry_history = fetch_entry_history(entry_id)
+        entry_history = histories.get(entry_id, {})
         chip_gws = {
             int(chip["event"])
             for chip in entry_history.get("chips", []) or []
@@ -178,8 +221,24 @@ def everest_rows(league_id: int, latest_completed_gw: int) -> List[Dict[str, Any
     return rows
 
 
+@st.cache_resource(ttl=600, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _shared_everest_rows(
+    league_id: int, latest_completed_gw: int, version: DataVersion, missing: Tuple[int, ...]
+) -> Records:
+    standings = league_table(league_id, version).rows
+    histories = current_histories(league_id, version).histories
+    return freeze_records(build_everest_rows(standings, histories, latest_completed_gw))
+
+
+def everest_rows(league_id: int, latest_completed_gw: int) -> Records:
+    return _shared_everest_rows(league_id, latest_completed_gw, data_version(), missing_entries(league_id))
+
+
 def everest_table(league_id: int, latest_completed_gw: int) -> pd.DataFrame:
-    rows = everest_rows(league_id, latest_completed_gw)
+    return everest_frame(everest_rows(league_id, latest_completed_gw))
+
+
+def everest_frame(rows: Sequence[Mapping[str, Any]]) -> pd.DataFrame:
     if not rows:
         return pd.DataFrame()
 
@@ -187,7 +246,7 @@ def everest_table(league_id: int, latest_completed_gw: int) -> pd.DataFrame:
         by=["Net Points", "Points", "Gameweek", "Manager"],
         ascending=[False, False, True, True],
     ).reset_index(drop=True)
-    return _position_rows(df, ["Net Points"])
+    return insert_position(df, ["Net Points"])
 
 
 def _match_participant(match: Dict[str, Any], side: int) -> Dict[str, Any]:
@@ -209,15 +268,29 @@ def _winner_and_loser(match: Dict[str, Any]) -> tuple[Dict[str, Any], Dict[str,
     return entry_2, entry_1
 
 
-@st.cache_data(ttl=600, show_spinner=False)
-def knockout_cup_rows(league_id: int) -> List[Dict[str, Any]]:
+def fetch_knockout_matches(league_id: int) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    The generated cup league's semi-final (GW37) and final (GW38) matches.
+    """
     cup_status = fetch_league_cup_status(league_id)
     cup_league_id = cup_status.get("league")
     if not cup_league_id:
-        return []
+        return {}
+    return {gw: fetch_h2h_matches(int(cup_league_id), event=gw) for gw in (37, 38)}
+
+
+@st.cache_resource(ttl=600, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _shared_knockout_cup_rows(league_id: int, version: DataVersion) -> Records:
+    return freeze_records(build_knockout_cup_rows(fetch_knockout_matches(league_id)))
+
+
+def knockout_cup_rows(league_id: int) -> Records:
+    return _shared_knockout_cup_rows(league_id, data_version())
+
 
-    final_matches = fetch_h2h_matches(int(cup_league_id), event=38)
-    semifinal_matches = fetch_h2h_matches(int(cup_league_id), event=37)
+def build_knockout_cup_rows(matches: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    final_matches = matches.get(38, [])
+    semifinal_matches = matches.get(37, [])
     if not final_matches:
         return []
 
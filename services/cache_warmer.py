@@ -0,0 +1,209 @@
+# services/cache_warmer.py
+"""
+Refresh-ahead warmer for the FPL response store.
+
+Each cycle reads the event timeline from bootstrap-static and revalidates,
+before they reach HTTP_CACHE_TTL, the responses the pages read: standings,
+every manager's history and, while a GW is live, that GW's picks. When FPL
+marks a GW finished the warmer refetches everything for it straight away (its
+picks are then stored as final) and, inside the app, rebuilds the shared
+season clock and points matrix, so the first visitor after a GW ends does not
+pay the cold-fetch cost either.
+
+Between live GWs, histories are delta-synced (services/delta_sync.py): only
+managers whose standings total disagrees with their stored
+history are refetched.
+
+Run it inside the app with start_cache_warmer() (CACHE_WARMER_ENABLED), or as
+a sidecar process with scripts/warm_cache.py.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import streamlit as st
+
+from config import (
+    CACHE_WARMER_ENABLED,
+    FPL_MAX_WORKERS,
+    HTTP_CACHE_TTL,
+    LEAGUE_ID,
+    WARM_IDLE_INTERVAL,
+    WARM_LIVE_INTERVAL,
+)
+from services import http_cache
+from services.delta_sync import DeltaReport, delta_sync_histories
+from services.fpl_service import (
+    entry_event_picks_url,
+    entry_history_url,
+    league_standings_url,
+    safe_request,
+)
+from services.points_matrix import season_points_matrix
+from services.season_clock import SeasonClock, build_season_clock, season_clock
+
+# Responses older than this are revalidated, leaving a margin before they expire.
+WARM_MAX_AGE = HTTP_CACHE_TTL * 0.6
+# An idle pass must start before what the previous one refreshed expires.
+WARM_IDLE_DELAY = min(WARM_IDLE_INTERVAL, HTTP_CACHE_TTL * 0.8)
+
+
+@dataclass
+class WarmReport:
+    latest_finished_gw: int = 0
+    live_gw: Optional[int] = None
+    newly_finished: bool = False
+    requests: int = 0
+    failed: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    clock: Optional[SeasonClock] = None
+    delta: Optional[DeltaReport] = None
+
+
+def _warm_urls(urls: Iterable[str], max_age: float, report: WarmReport) -> None:
+    urls = list(urls)
+    if not urls:
+        return
+
+    def warm(url: str) -> None:
+        if not safe_request(url, max_age=max_age):
+            report.failed.append(url)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(FPL_MAX_WORKERS, len(urls)))) as pool:
+        list(pool.map(warm, urls))
+    report.requests += len(urls)
+
+
+def _warm_standings(league_id: int, max_age: float, report: WarmReport) -> List[Dict[str, Any]]:
+    """
+    Revalidate every standings page (pages are chained, so this is sequential)
+    and return the league's standings rows.
+    """
+    rows: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        data = safe_request(league_standings_url(league_id, page), max_age=max_age)
+        report.requests += 1
+        if not data:
+            report.failed.append(league_standings_url(league_id, page))
+            break
+        standings = data.get("standings", {})
+        rows.extend(standings.get("results", []))
+        if not standings.get("has_next", False):
+            break
+        page += 1
+    return rows
+
+
+def warm_once(league_id: int = LEAGUE_ID, previous_finished_gw: Optional[int] = None) -> WarmReport:
+    """
+    One refresh pass. `previous_finished_gw` is the latest finished GW seen by
+    the last pass; a newer one triggers a refetch of that GW's picks (histories
+    are delta-synced whenever no GW is live).
+    """
+    started = time.perf_counter()
+    report = WarmReport()
+    clock = build_season_clock(safe_request(http_cache.BOOTSTRAP_URL, max_age=0))
+    report.clock = clock
+    report.latest_finished_gw = clock.latest_finished_gw
+    report.live_gw = clock.live_gw
+    report.newly_finished = previous_finished_gw is not None and clock.latest_finished_gw > previous_finished_gw
+
+    max_age = 0 if report.newly_finished else WARM_MAX_AGE
+    if report.live_gw is None and clock.current_gw:
+        # Standings are settled, so they tell which histories changed.
+        standings = _warm_standings(league_id, 0, report)
+        report.delta = delta_sync_histories(standings, clock.current_gw)
+        report.requests += len(report.delta.refetched) + len(report.delta.failed)
+        report.failed.extend(entry_history_url(entry_id) for entry_id in report.delta.failed)
+    else:
+        standings = _warm_standings(league_id, max_age, report)
+        _warm_urls((entry_history_url(int(row["entry"])) for row in standings), max_age, report)
+    entry_ids = [int(row["entry"]) for row in standings]
+
+    picks_gws = [gw for gw in (report.live_gw, clock.latest_finished_gw if report.newly_finished else None) if gw]
+    for gw in picks_gws:
+        _warm_urls((entry_event_picks_url(entry_id, gw) for entry_id in entry_ids), max_age, report)
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+def next_warm_delay(clock: SeasonClock, now: Optional[datetime] = None) -> float:
+    """
+    Seconds until the next pass: often while a GW is live, otherwise every
+    WARM_IDLE_DELAY, but waking up just after the next deadline. Either way
+    nothing the pages read reaches HTTP_CACHE_TTL. None of this is needed
+    once the season is over.
+    """
+    if clock.live_gw is not None:
+        return WARM_LIVE_INTERVAL
+    upcoming = clock.next_deadline_event(now)
+    if upcoming is None:
+        return WARM_IDLE_DELAY
+    now = now or datetime.now(timezone.utc)
+    until_deadline = (upcoming.deadline - now).total_seconds() + WARM_LIVE_INTERVAL
+    return max(WARM_LIVE_INTERVAL, min(WARM_IDLE_DELAY, until_deadline))
+
+
+def run_warmer(
+    league_id: int = LEAGUE_ID,
+    stop: Optional[threading.Event] = None,
+    on_new_gw: Optional[Callable[[], None]] = None,
+    log: Callable[[str], None] = print,
+) -> None:
+    """
+    Warm until `stop` is set or the season is finished.
+    """
+    stop = stop or threading.Event()
+    finished_gw: Optional[int] = None
+    while not stop.is_set():
+        try:
+            report = warm_once(league_id, finished_gw)
+            log(
+                f"Cache warmer: {report.requests} requests in {report.seconds}s "
+                f"(finished GW{report.latest_finished_gw}, live GW{report.live_gw or '-'}, "
+                f"{len(report.failed)} failed)"
+            )
+            if report.delta is not None:
+                log(
+                    f"Cache warmer: delta sync kept {report.delta.unchanged}/{report.delta.checked} "
+                    f"histories, refetched {len(report.delta.refetched)}"
+                )
+            if report.newly_finished and on_new_gw is not None:
+                on_new_gw()
+            finished_gw = report.latest_finished_gw
+            if report.clock.season_finished:
+                log("Cache warmer: season finished; every response is final, stopping.")
+                return
+            delay = next_warm_delay(report.clock)
+        except Exception as e:
+            log(f"⚠️ Cache warmer pass failed: {e}")
+            delay = WARM_LIVE_INTERVAL
+        stop.wait(delay)
+
+
+def _refresh_shared_data(league_id: int) -> None:
+    season_clock.clear()
+    season_points_matrix(league_id)
+
+
+@st.cache_resource(show_spinner=False)
+def start_cache_warmer(league_id: int = LEAGUE_ID) -> Optional[threading.Thread]:
+    """
+    Start one daemon warmer thread per process (no-op unless
+    CACHE_WARMER_ENABLED). Safe to call from every page run.
+    """
+    if not CACHE_WARMER_ENABLED:
+        return None
+    thread = threading.Thread(
+        target=run_warmer,
+        kwargs={"league_id": league_id, "on_new_gw": lambda: _refresh_shared_data(league_id)},
+        name="fpl-cache-warmer",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,55 @@
+# services/db.py
+"""
+SQLite connection handling shared by the local stores.
+
+Each thread keeps one open connection per database file (in WAL mode, so
+readers never wait on a writer), and each database's schema migrations run
+once per process, tracked with PRAGMA user_version.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Sequence, Set, Union
+
+Migration = Union[str, Callable[[sqlite3.Connection], None]]
+
+_local = threading.local()
+_migrate_lock = threading.Lock()
+_migrated: Set[Path] = set()
+
+
+def _migrate(conn: sqlite3.Connection, db_path: Path, migrations: Sequence[Migration]) -> None:
+    if db_path in _migrated:
+        return
+    with _migrate_lock:
+        if db_path in _migrated:
+            return
+        version = int(conn.execute("PRAGMA user_version").fetchone()[0])
+        for number, migration in enumerate(migrations, start=1):
+            if number <= version:
+                continue
+            with conn:
+                if callable(migration):
+                    migration(conn)
+                else:
+                    conn.execute(migration)
+                conn.execute(f"PRAGMA user_version = {number}")
+        _migrated.add(db_path)
+
+
+def connect(db_path: Path, migrations: Sequence[Migration]) -> sqlite3.Connection:
+    """
+    The calling thread's connection to `db_path`, opened and migrated on first use.
+    Use `with conn:` for a transaction; do not close it.
+    """
+    connections: Dict[Path, sqlite3.Connection] = _local.__dict__.setdefault("connections", {})
+    conn = connections.get(db_path)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _migrate(conn, db_path, migrations)
+        connections[db_path] = conn
+    return conn
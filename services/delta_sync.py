@@ -0,0 +1,112 @@
+# services/delta_sync.py
+"""
+Delta sync for entry histories.
+
+One standings sweep gives every manager's season `total`. A manager whose
+stored history already ends with the current GW at that same total has
+nothing new to fetch: the stored response is only marked fresh
+(http_cache.touch). Only managers that disagree are refetched, e.g. those
+whose stored history predates the GW or who had a points correction (any
+correction moves the total). After a gameweek, the refresh then costs the
+standings pages plus one call per changed manager instead of one per
+manager.
+
+`event_total` is not compared: FPL does not document whether it has the
+GW's hit deducted, and raw points and hits are read from the history rows.
+
+Standings are only trusted once the current GW is finished. While it is
+live they can lag the histories, so callers should revalidate normally.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from config import FPL_MAX_WORKERS
+from services import http_cache
+from services.fpl_service import FETCH_OK, FetchResult, entry_history_url, fetch_url
+
+
+@dataclass
+class DeltaReport:
+    gw: int
+    checked: int = 0
+    unchanged: int = 0
+    refetched: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def history_matches(history: Mapping[str, Any] | None, gw: int, total: int) -> bool:
+    """
+    Whether a stored history already ends with `gw` at standings' `total`.
+    """
+    rows = (history or {}).get("current", []) or []
+    if not rows:
+        return False
+    last = rows[-1]
+    return int(last.get("event", 0)) == gw and int(last.get("total_points", 0)) == total
+
+
+def stored_histories(
+    standings: Iterable[Mapping[str, Any]], gw: int
+) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    """
+    Stored history payloads that agree with the standings rows, by entry id,
+    and the entry ids that need a refetch. Never touches the network.
+    """
+    current: Dict[int, Dict[str, Any]] = {}
+    changed: List[int] = []
+    for row in standings:
+        entry_id = int(row["entry"])
+        cached = http_cache.lookup(entry_history_url(entry_id))
+        if cached and history_matches(cached.payload, gw, int(row.get("total") or 0)):
+            current[entry_id] = cached.payload
+        else:
+            changed.append(entry_id)
+    return current, changed
+
+
+def refetch_histories(entry_ids: List[int]) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    """
+    Revalidate `entry_ids`' histories against the API (bypassing freshness).
+    Returns the payloads fetched and the entries that failed; a stale stored
+    payload served because the API failed counts as failed.
+    """
+    fetched: Dict[int, Dict[str, Any]] = {}
+    failed: List[int] = []
+    if not entry_ids:
+        return fetched, failed
+
+    def refetch(entry_id: int) -> FetchResult:
+        return fetch_url(entry_history_url(entry_id), max_age=0)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(FPL_MAX_WORKERS, len(entry_ids)))) as pool:
+        for entry_id, result in zip(entry_ids, pool.map(refetch, entry_ids)):
+            if result.status == FETCH_OK and result.payload:
+                fetched[entry_id] = result.payload
+            else:
+                failed.append(entry_id)
+    return fetched, failed
+
+
+def delta_sync_histories(standings: List[Mapping[str, Any]], gw: int) -> DeltaReport:
+    """
+    Bring every history in `standings` up to date with GW `gw` (FPL's
+    current GW, finished), refetching only the managers that changed.
+    `standings` should have just been fetched.
+    """
+    started = time.perf_counter()
+    report = DeltaReport(gw=gw, checked=len(standings))
+    current, changed = stored_histories(standings, gw)
+
+    for entry_id in current:
+        http_cache.touch(entry_history_url(entry_id))
+    report.unchanged = len(current)
+
+    fetched, failed = refetch_histories(changed)
+    report.refetched = list(fetched)
+    report.failed = failed
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
@@ -1,27 +1,197 @@
 # services/fpl_service.py
-import requests
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Set, Tuple, Callable, Iterable
 import streamlit as st
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from requests.exceptions import ReadTimeout, ConnectionError, HTTPError
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-def safe_request(url: str, timeout: int = 20, retries: int = 3, sleep_time: int = 2):
+from config import FPL_BACKGROUND_RETRIES, FPL_MAX_WORKERS, FPL_NEGATIVE_TTL, FPL_RETRIES
+from services import http_cache
+from services.http_session import get_session
+from services.negative_cache import NegativeCache
+from services.rate_limit import backoff_delay, limiter, retry_after_seconds
+from services.single_flight import SingleFlight
+
+THROTTLE_STATUSES = {429, 503}
+
+# One in-flight network fetch per URL across every session and worker thread.
+requests_in_flight = SingleFlight()
+
+
+# Fetch outcomes carried by FetchResult.status.
+FETCH_OK = "ok"  # fresh from the API or the response store
+FETCH_STALE = "stale"  # the API failed; an older stored payload is served
+FETCH_NOT_FOUND = "not_found"  # 4xx: the entry/GW does not exist (yet)
+FETCH_FAILED = "failed"  # nothing to serve; retried in the background
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    payload: Any
+    status: str
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (FETCH_OK, FETCH_STALE)
+
+
+class FetchError(Exception):
+    """
+    Raised by the st.cache_data fetchers when nothing could be fetched, so
+    Streamlit does not cache the failure as an empty payload.
+    """
+    def __init__(self, url: str, status: str):
+        super().__init__(f"FPL fetch {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+# URLs that just failed, answered from memory for FPL_NEGATIVE_TTL seconds.
+failed_fetches = NegativeCache(FPL_NEGATIVE_TTL)
+
+
+def safe_request(url: str, timeout: int = 20, retries: int = FPL_RETRIES, max_age: float | None = None):
     """
     Production-safe request wrapper for the FPL API.
-    Retries + backoff + graceful failure.
+    Retries + backoff + graceful failure, over the pooled keep-alive session.
+    Returns the payload, or {} when nothing could be fetched; use fetch_url
+    to tell a failure apart from an empty payload.
+
+    Every request takes a token from the shared rate limiter. 429/503 responses
+    pause all threads for Retry-After (or a jittered backoff) and lower the
+    allowed concurrency; other transient failures back off exponentially.
+
+    Responses go through the persistent http_cache store: final payloads are
+    served without a network call, fresh ones within HTTP_CACHE_TTL, and stale
+    ones are revalidated conditionally (and served as-is if the API is down or
+    the store is in offline mode). `max_age` overrides HTTP_CACHE_TTL, e.g. 0
+    to revalidate anything that is not final.
+
+    Concurrent misses for the same URL (e.g. several sessions opening a page
+    right after a GW) share one network fetch through the single-flight layer.
     """
+    return fetch_url(url, timeout, retries, max_age).payload
+
+
+def fetch_url(
+    url: str, timeout: int = 20, retries: int = FPL_RETRIES, max_age: float | None = None
+) -> FetchResult:
+    """
+    safe_request with an explicit status. A failed URL is answered from the
+    negative cache for FPL_NEGATIVE_TTL seconds and refetched in the
+    background, so the response store holds it by the time callers retry.
+    """
+    cached = http_cache.lookup(url)
+    fresh = cached and (cached.is_fresh() if max_age is None else cached.is_fresh(max_age))
+    if cached and (fresh or http_cache.offline()):
+        return FetchResult(cached.payload, FETCH_OK)
+    if http_cache.offline():
+        print(f"⚠️ Offline and nothing stored for {url}")
+        return FetchResult({}, FETCH_FAILED)
+    if failed_fetches.recent(url):
+        return FetchResult(cached.payload, FETCH_STALE) if cached else FetchResult({}, FETCH_FAILED)
+
+    return requests_in_flight.do(url, lambda: _fetch_and_record(url, cached, timeout, retries))
+
+
+def _fetch_and_record(
+    url: str, cached: http_cache.CachedResponse | None, timeout: int, retries: int
+) -> FetchResult:
+    """
+    _fetch plus the negative-cache bookkeeping, run once per fetch by the
+    single-flight leader (followers share its result).
+    """
+    result = _fetch(url, cached, timeout, retries)
+    if result.status in (FETCH_OK, FETCH_NOT_FOUND):
+        failed_fetches.discard(url)
+    else:
+        _retry_in_background(url, failed_fetches.add(url), timeout, retries)
+    return result
+
+
+# URLs with a background retry already scheduled; at most one timer per URL.
+_pending_retries: Set[str] = set()
+_pending_lock = threading.Lock()
+
+
+def _retry_in_background(url: str, attempts: int, timeout: int, retries: int) -> None:
+    if attempts > FPL_BACKGROUND_RETRIES:
+        return
+    with _pending_lock:
+        if url in _pending_retries:
+            return
+        _pending_retries.add(url)
+
+    def retry() -> None:
+        with _pending_lock:
+            _pending_retries.discard(url)
+        fetch_url(url, timeout, retries, max_age=0)
+
+    timer = threading.Timer(FPL_NEGATIVE_TTL * attempts, retry)
+    timer.daemon = True
+    timer.start()
+
+
+def _fetch(url: str, cached: http_cache.CachedResponse | None, timeout: int, retries: int) -> FetchResult:
+    headers = http_cache.revalidation_headers(cached)
     for attempt in range(retries):
         try:
-            r = requests.get(url, timeout=timeout)
+            with limiter.request():
+                r = get_session().get(url, timeout=timeout, headers=headers)
+
+            if r.status_code in THROTTLE_STATUSES:
+                delay = retry_after_seconds(r.headers.get("Retry-After"))
+                limiter.throttled(delay if delay is not None else backoff_delay(attempt))
+                continue
+
+            if r.status_code == 304 and cached:
+                limiter.succeeded()
+                http_cache.touch(url)
+                return FetchResult(cached.payload, FETCH_OK)
+
+            if 400 <= r.status_code < 500:
+                # Missing entry/GW: retrying will not help.
+                print(f"⚠️ FPL API returned {r.status_code} for {url}")
+                return FetchResult(cached.payload if cached else {}, FETCH_NOT_FOUND)
+
             r.raise_for_status()
-            return r.json()
+            payload = r.json()
+            limiter.succeeded()
+            http_cache.store(url, payload, r.headers)
+            return FetchResult(payload, FETCH_OK)
+
+        except (ReadTimeout, ConnectionError, HTTPError, ValueError):
+            limiter.failed()
+            if attempt < retries - 1:
+                time.sleep(backoff_delay(attempt))
+
+    # Last attempt failed → don't crash app
+    print(f"⚠️ FPL API failed for {url}")
+    return FetchResult(cached.payload, FETCH_STALE) if cached else FetchResult({}, FETCH_FAILED)
+
+
+def _require(url: str, max_age: float | None = None) -> Dict[str, Any]:
+    """
+    Payload for `url`, raising FetchError when nothing could be fetched.
+    """
+    result = fetch_url(url, max_age=max_age)
+    if not result.ok:
+        raise FetchError(url, result.status)
+    return result.payload
 
-        except (ReadTimeout, ConnectionError, HTTPError) as e:
-            if attempt == retries - 1:
-                # Last attempt failed → don't crash app
-                print(f"⚠️ FPL API failed for {url}")
-                return {}
-            time.sleep(sleep_time)
+
+def require_current(url: str, max_age: float | None = None) -> Dict[str, Any]:
+    """
+    Like _require, but a stale stored payload (served because the API failed)
+    raises too. For results that are cached for good once computed.
+    """
+    result = fetch_url(url, max_age=max_age)
+    if result.status != FETCH_OK:
+        raise FetchError(url, result.status)
+    return result.payload
 
 
 # --- CONFIG ---
@@ -33,9 +203,29 @@ def fetch_bootstrap_static() -> Dict[str, Any]:
     """
     Fetches the FPL bootstrap-static payload (events, teams, elements, etc.).
     We'll use the 'events' list to determine which GWs are finished.
+    Raises FetchError instead of caching a failed fetch.
     """
-    url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    return safe_request(url)
+    return _require(http_cache.BOOTSTRAP_URL)
+
+# -------- Endpoint URLs --------
+def league_standings_url(league_id: int, page: int) -> str:
+    return f"https://fantasy.premierleague.com/api/leagues-classic/{league_id}/standings/?page_standings={page}"
+
+
+def entry_history_url(entry_id: int) -> str:
+    return f"https://fantasy.premierleague.com/api/entry/{entry_id}/history/"
+
+
+def entry_event_picks_url(entry_id: int, gw: int) -> str:
+    return f"https://fantasy.premierleague.com/api/entry/{entry_id}/event/{gw}/picks/"
+
+
+def event_live_url(gw: int) -> str:
+    return f"https://fantasy.premierleague.com/api/event/{gw}/live/"
+
+
+def fixtures_url(gw: int) -> str:
+    return f"https://fantasy.premierleague.com/api/fixtures/?event={gw}"
 
 # -------- League / standings (handles pagination to fetch >50 entries) --------
 @st.cache_data(ttl=CACHE_TTL, show_spinner=False)
@@ -43,14 +233,12 @@ def fetch_all_league_standings(league_id: int) -> List[Dict[str, Any]]:
     """
     Returns full classic-league standings across all pages.
     Each item contains: entry, entry_name, player_name, rank, total, etc.
+    Raises FetchError if any page fails, so partial standings are never cached.
     """
     results: List[Dict[str, Any]] = []
     page = 1
     while True:
-        url = f"https://fantasy.premierleague.com/api/leagues-classic/{league_id}/standings/?page_standings={page}"
-        data = safe_request(url)
-        if not data:
-            break
+        data = _require(league_standings_url(league_id, page))
         page_results = data.get("standings", {}).get("results", [])
         results.extend(page_results)
         has_next = data.get("standings", {}).get("has_next", False)
@@ -71,7 +259,8 @@ def standings_index_by_entry(league_id: int) -> Dict[int, Dict[str, Any]]:
 def fetch_league_standings_for_gw(league_id: int, gw: int) -> List[Dict[str, Any]]:
     """
     Fetch league standings snapshot for a specific GW.
-    Uses safe_request + pagination + backoff.
+    Uses safe_request + pagination; pacing comes from the shared rate limiter.
+    Raises FetchError if any page fails, so partial standings are never cached.
     """
     results: List[Dict[str, Any]] = []
     page = 1
@@ -82,11 +271,8 @@ def fetch_league_standings_for_gw(league_id: int, gw: int) -> List[Dict[str, Any
             f"{league_id}/standings/?page_standings={page}&event_standings={gw}"
         )
 
-        data = safe_request(url)
-
-        # API failed → stop gracefully (don't corrupt data)
-        if not data:
-            break
+        # API failed → raise rather than cache a partial table
+        data = _require(url)
 
         page_results = data.get("standings", {}).get("results", [])
         results.extend(page_results)
@@ -96,7 +282,6 @@ def fetch_league_standings_for_gw(league_id: int, gw: int) -> List[Dict[str, Any
             break
 
         page += 1
-        time.sleep(1)  # rate limit
 
     return results
 
@@ -105,16 +290,18 @@ def fetch_league_standings_for_gw(league_id: int, gw: int) -> List[Dict[str, Any
 def fetch_league_cup_status(league_id: int) -> Dict[str, Any]:
     """
     Returns FPL's cup status for a classic league, including the generated
-    knockout cup league id.
+    knockout cup league id. Raises FetchError instead of caching a failed
+    fetch (which would read as "no cup").
     """
     url = f"https://fantasy.premierleague.com/api/league/{league_id}/cup-status/"
-    return safe_request(url)
+    return _require(url)
 
 
 @st.cache_data(ttl=CACHE_TTL, show_spinner=False)
 def fetch_h2h_matches(league_id: int, event: int | None = None) -> List[Dict[str, Any]]:
     """
     Returns all H2H/cup matches for a generated cup league.
+    Raises FetchError if any page fails, so a partial match list is never cached.
     """
     results: List[Dict[str, Any]] = []
     page = 1
@@ -124,10 +311,7 @@ def fetch_h2h_matches(league_id: int, event: int | None = None) -> List[Dict[str
         if event is not None:
             url += f"&event={event}"
 
-        data = safe_request(url)
-        if not data:
-            break
-
+        data = _require(url)
         results.extend(data.get("results", []) or [])
         if not data.get("has_next", False):
             break
@@ -140,9 +324,9 @@ def fetch_h2h_matches(league_id: int, event: int | None = None) -> List[Dict[str
 def fetch_entry_event_picks(entry_id: int, gw: int) -> Dict[str, Any]:
     """
     Raw event data for an entry for GW (includes entry_history: points, event_transfers_cost, etc.)
+    Raises FetchError instead of caching a failed fetch.
     """
-    url = f"https://fantasy.premierleague.com/api/entry/{entry_id}/event/{gw}/picks/"
-    return safe_request(url)
+    return _require(entry_event_picks_url(entry_id, gw))
 
 
 @st.cache_data(ttl=CACHE_TTL, show_spinner=False)
@@ -150,10 +334,89 @@ def fetch_entry_history(entry_id: int) -> Dict[str, Any]:
     """
     Fetches an entry's season history. The `current` list contains each GW's
     cumulative official FPL `total_points`, which is what the classic mini
-    league table is based on after that GW.
+    league table is based on after that GW. Raises FetchError instead of
+    caching a failed fetch.
     """
-    url = f"https://fantasy.premierleague.com/api/entry/{entry_id}/history/"
-    return safe_request(url)
+    return _require(entry_history_url(entry_id))
+
+# -------- Live gameweek --------
+LIVE_TTL = 60  # seconds; how stale live scores may be while a GW is in play
+
+
+def fetch_event_live(gw: int) -> Dict[str, Any]:
+    """
+    Every player's live stats for a GW (`elements[].stats.total_points`,
+    `minutes`, ...). One call covers the whole game, so it is refreshed every
+    LIVE_TTL seconds rather than cached per session. Raises FetchError when
+    nothing could be fetched, rather than scoring everyone from empty stats.
+    """
+    return _require(event_live_url(gw), max_age=LIVE_TTL)
+
+
+def fetch_fixtures(gw: int) -> List[Dict[str, Any]]:
+    """
+    The GW's fixtures, with `started`, `finished_provisional` and `finished` flags.
+    Raises FetchError when nothing could be fetched: an empty list would read
+    as every team being done and trigger automatic substitutions early.
+    """
+    return _require(fixtures_url(gw), max_age=LIVE_TTL)
+
+# -------- Batched per-entry fetches --------
+@dataclass
+class BatchResult:
+    """
+    Outcome of a batched per-entry fetch. `results` preserves the order of the
+    requested entry ids; entries whose fetch failed (empty payload or error)
+    are listed in `failed` and map to an empty dict in `results`.
+    """
+    results: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    failed: List[int] = field(default_factory=list)
+
+
+def _fetch_many(fetch: Callable[..., Dict[str, Any]], entry_ids: Iterable[int], *args) -> BatchResult:
+    entry_ids = [int(entry_id) for entry_id in entry_ids]
+    batch = BatchResult()
+    if not entry_ids:
+        return batch
+
+    # Worker threads inherit the session's script context so cached fetchers
+    # behave exactly as they do when called from the page itself.
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def fetch_one(entry_id: int) -> Dict[str, Any]:
+        try:
+            return fetch(entry_id, *args) or {}
+        except Exception as e:
+            print(f"⚠️ Error for entry {entry_id}: {e}")
+            return {}
+
+    workers = max(1, min(FPL_MAX_WORKERS, len(entry_ids)))
+    with ThreadPoolExecutor(
+        max_workers=workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as pool:
+        payloads = list(pool.map(fetch_one, entry_ids))
+
+    for entry_id, payload in zip(entry_ids, payloads):
+        batch.results[entry_id] = payload
+        if not payload:
+            batch.failed.append(entry_id)
+    return batch
+
+
+def fetch_entry_event_picks_many(entry_ids: Iterable[int], gw: int) -> BatchResult:
+    """
+    Fetch GW picks for many entries concurrently on a bounded thread pool.
+    """
+    return _fetch_many(fetch_entry_event_picks, entry_ids, gw)
+
+
+def fetch_entry_history_many(entry_ids: Iterable[int]) -> BatchResult:
+    """
+    Fetch season histories for many entries concurrently on a bounded thread pool.
+    """
+    return _fetch_many(fetch_entry_history, entry_ids)
+
 
 def compute_net_points(entry_event: Dict[str, Any]):
     """
@@ -0,0 +1,102 @@
+# services/gameweek_events.py
+"""
+The season timeline types behind season_clock(), built from a
+bootstrap-static payload without any I/O, so the response store can judge
+finality from its stored copy too.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+SEASON_GWS = 38
+
+
+@dataclass(frozen=True)
+class GameweekEvent:
+    id: int
+    deadline: Optional[datetime]
+    finished: bool
+    data_checked: bool
+    is_current: bool
+    is_next: bool
+
+    @classmethod
+    def from_event(cls, event: Dict[str, Any]) -> "GameweekEvent":
+        deadline_time = event.get("deadline_time")
+        return cls(
+            id=int(event.get("id", 0)),
+            deadline=datetime.fromisoformat(deadline_time.replace("Z", "+00:00")) if deadline_time else None,
+            finished=bool(event.get("finished")),
+            data_checked=bool(event.get("data_checked")),
+            is_current=bool(event.get("is_current")),
+            is_next=bool(event.get("is_next")),
+        )
+
+
+@dataclass(frozen=True)
+class SeasonClock:
+    events: Tuple[GameweekEvent, ...]
+    fetched_at: datetime
+
+    @property
+    def latest_finished_gw(self) -> int:
+        return max((event.id for event in self.events if event.finished), default=0)
+
+    @property
+    def latest_final_gw(self) -> int:
+        """
+        The last GW of the unbroken run of final GWs (is_final) from GW1.
+        """
+        gw = 0
+        while gw < SEASON_GWS and self.is_final(gw + 1):
+            gw += 1
+        return gw
+
+    @property
+    def current_gw(self) -> int:
+        """
+        The GW FPL marks as current (its deadline has passed), finished or not.
+        """
+        return max((event.id for event in self.events if event.is_current), default=self.latest_finished_gw)
+
+    @property
+    def live_gw(self) -> Optional[int]:
+        """
+        The current GW while its matches are still being played or scored.
+        """
+        event = self.event(self.current_gw)
+        return event.id if event and not event.finished else None
+
+    @property
+    def season_finished(self) -> bool:
+        return self.latest_finished_gw >= SEASON_GWS
+
+    def event(self, gw: int) -> Optional[GameweekEvent]:
+        for event in self.events:
+            if event.id == gw:
+                return event
+        return None
+
+    def deadline(self, gw: int) -> Optional[datetime]:
+        event = self.event(gw)
+        return event.deadline if event else None
+
+    def next_deadline_event(self, now: Optional[datetime] = None) -> Optional[GameweekEvent]:
+        now = now or datetime.now(timezone.utc)
+        return next((event for event in self.events if event.deadline and event.deadline > now), None)
+
+    def is_final(self, gw: int) -> bool:
+        """
+        Whether GW data can no longer change: finished and FPL's bonus and
+        points checks are done.
+        """
+        event = self.event(gw)
+        return bool(event and event.finished and event.data_checked)
+
+
+def build_season_clock(bootstrap: Dict[str, Any]) -> SeasonClock:
+    events = sorted(
+        (GameweekEvent.from_event(event) for event in bootstrap.get("events", []) or []),
+        key=lambda event: event.id,
+    )
+    return SeasonClock(events=tuple(events), fetched_at=datetime.now(timezone.utc))
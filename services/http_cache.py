@@ -0,0 +1,195 @@
+# services/http_cache.py
+"""
+Persistent SQLite store for FPL API responses, used underneath safe_request.
+
+A response is stored as "final" when it can no longer change at the moment it
+was fetched: per-gameweek payloads (picks, live scores, cup fixtures for one
+event) once that GW is final, and every payload once GW38 is final. Finality
+is SeasonClock.is_final (finished and data_checked, so late bonus and
+corrections are still fetched) on the stored bootstrap-static payload. Final responses are served forever without a
+network call; everything else is served for HTTP_CACHE_TTL seconds and then
+revalidated with If-None-Match / If-Modified-Since.
+
+In offline mode (FPL_OFFLINE / set_offline) safe_request serves whatever is
+stored, however old, and never touches the network; scripts/ingest_season.py
+fills the store for that.
+
+Delete HTTP_CACHE_DB_PATH when a new season starts.
+"""
+import json
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+from config import FPL_OFFLINE, HTTP_CACHE_DB_PATH, HTTP_CACHE_TTL
+from services import db
+from services.gameweek_events import SEASON_GWS, SeasonClock, build_season_clock
+
+BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+
+# URL patterns whose payload belongs to a single gameweek.
+_GW_URL_PATTERNS = [
+    re.compile(r"/entry/\d+/event/(\d+)/picks/"),
+    re.compile(r"/event/(\d+)/live/"),
+    re.compile(r"/leagues-h2h-matches/league/\d+/\?.*\bevent=(\d+)"),
+    re.compile(r"/fixtures/\?event=(\d+)"),
+]
+
+_stored_clock: Optional[SeasonClock] = None
+_offline = FPL_OFFLINE
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    url: str
+    payload: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    final: bool
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def is_fresh(self, ttl: int = HTTP_CACHE_TTL) -> bool:
+        return self.final or self.age < ttl
+
+
+def set_offline(enabled: bool) -> None:
+    global _offline
+    _offline = enabled
+
+
+def offline() -> bool:
+    return _offline
+
+
+HTTP_CACHE_MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS http_responses (
+        url TEXT PRIMARY KEY,
+        body TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        stored_at REAL NOT NULL,
+        final INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # Rows frozen once their GW was merely finished (before data_checked)
+    # are revalidated once and re-marked under SeasonClock.is_final.
+    "UPDATE http_responses SET final = 0",
+]
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect(HTTP_CACHE_DB_PATH, HTTP_CACHE_MIGRATIONS)
+
+
+def url_gameweek(url: str) -> Optional[int]:
+    """
+    The gameweek a URL's payload is pinned to, or None for season-wide
+    endpoints (history, standings, cup status, bootstrap-static).
+    """
+    for pattern in _GW_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def stored_clock() -> SeasonClock:
+    """
+    Season timeline from the most recently stored bootstrap-static payload.
+    Never touches the network.
+    """
+    global _stored_clock
+    if _stored_clock is None:
+        cached = lookup(BOOTSTRAP_URL)
+        _stored_clock = build_season_clock(cached.payload if cached else {})
+    return _stored_clock
+
+
+def is_final(url: str) -> bool:
+    """
+    Whether a response fetched for `url` right now can never change again.
+    """
+    clock = stored_clock()
+    if clock.is_final(SEASON_GWS):
+        return True
+    gw = url_gameweek(url)
+    return gw is not None and clock.is_final(gw)
+
+
+def lookup(url: str) -> Optional[CachedResponse]:
+    with _connect() as conn:
+        row = conn.execute(
+            """
+            SELECT url, body, etag, last_modified, stored_at, final
+            FROM http_responses
+            WHERE url = ?
+            """,
+            (url,),
+        ).fetchone()
+
+    if not row:
+        return None
+    return CachedResponse(
+        url=row["url"],
+        payload=json.loads(row["body"]),
+        etag=row["etag"],
+        last_modified=row["last_modified"],
+        stored_at=float(row["stored_at"]),
+        final=bool(row["final"]),
+    )
+
+
+def store(url: str, payload: Any, headers: Optional[Mapping[str, str]] = None) -> None:
+    global _stored_clock
+    if not payload:
+        return
+
+    headers = headers or {}
+    if url == BOOTSTRAP_URL:
+        _stored_clock = build_season_clock(payload)
+
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO http_responses
+                (url, body, etag, last_modified, stored_at, final)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                url,
+                json.dumps(payload, separators=(",", ":")),
+                headers.get("ETag"),
+                headers.get("Last-Modified"),
+                time.time(),
+                int(is_final(url)),
+            ),
+        )
+
+
+def touch(url: str) -> None:
+    """
+    Mark a stored response as freshly validated (after a 304 Not Modified).
+    """
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE http_responses SET stored_at = ?, final = ? WHERE url = ?",
+            (time.time(), int(is_final(url)), url),
+        )
+
+
+def revalidation_headers(cached: Optional[CachedResponse]) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    if not cached:
+        return headers
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    return headers
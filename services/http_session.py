@@ -0,0 +1,88 @@
+# services/http_session.py
+"""
+Process-wide pooled HTTP client for the FPL API.
+
+Every thread gets its own lightweight requests.Session (so cookie handling is
+never shared), but all of them mount the same HTTPAdapter, whose urllib3 pool
+manager keeps keep-alive connections per host. A connection opened by one
+thread is reused by the next request on any thread, so the TCP+TLS handshake to
+fantasy.premierleague.com is paid at most FPL_POOL_SIZE times per process.
+"""
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import FPL_POOL_HOSTS, FPL_POOL_SIZE
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "User-Agent": "bigwhammystats/1.0",
+}
+
+_adapter_lock = threading.Lock()
+_adapter: Optional[HTTPAdapter] = None
+_local = threading.local()
+
+
+def _shared_adapter() -> HTTPAdapter:
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                # pool_block makes extra threads wait for a free connection
+                # instead of opening throwaway ones beyond the pool size.
+                _adapter = HTTPAdapter(
+                    pool_connections=FPL_POOL_HOSTS,
+                    pool_maxsize=FPL_POOL_SIZE,
+                    pool_block=True,
+                )
+    return _adapter
+
+
+def get_session() -> requests.Session:
+    """
+    The calling thread's session, backed by the shared connection pool.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = _shared_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def session_stats() -> Dict[str, Any]:
+    """
+    Connection-reuse statistics per host: how many connections were opened
+    versus how many requests were sent over them.
+    """
+    hosts: Dict[str, Dict[str, int]] = {}
+    if _adapter is not None:
+        pools = _adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened = int(pool.num_connections)
+            sent = int(pool.num_requests)
+            hosts[f"{pool.scheme}://{pool.host}"] = {
+                "connections_opened": opened,
+                "requests": sent,
+                "reused": max(0, sent - opened),
+            }
+
+    opened = sum(item["connections_opened"] for item in hosts.values())
+    sent = sum(item["requests"] for item in hosts.values())
+    return {
+        "hosts": hosts,
+        "connections_opened": opened,
+        "requests": sent,
+        "reuse_ratio": round(1 - opened / sent, 3) if sent else 0.0,
+    }
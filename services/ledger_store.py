@@ -0,0 +1,175 @@
+# services/ledger_store.py
+"""
+SQLite backend for the winners ledger (LEDGER_BACKEND = "sqlite").
+
+Every season's entries live in one indexed table, and a materialized
+ledger_totals table holds each manager-team's award count and WC total. It is
+rewritten in the same transaction as the entries, so the Tally page reads the
+leaderboard or one manager's rows with an index lookup instead of parsing and
+grouping the whole ledger. Saving a season replaces only that season's rows.
+"""
+import json
+import sqlite3
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from config import LEDGER_DB_PATH
+from services import db
+
+ENTRY_COLUMNS = ["manager", "team", "manager_team", "award", "detail", "position", "wc", "source"]
+TOTALS_COLUMNS = ["Manager-Team", "Awards Won", "Total WC"]
+
+LEDGER_MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS ledger_seasons (
+        season TEXT PRIMARY KEY,
+        league_id INTEGER,
+        currency TEXT NOT NULL,
+        generated_at TEXT,
+        metadata TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ledger_entries (
+        season TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        manager TEXT NOT NULL,
+        team TEXT NOT NULL,
+        manager_team TEXT NOT NULL,
+        award TEXT NOT NULL,
+        detail TEXT NOT NULL,
+        position TEXT NOT NULL,
+        wc NUMERIC NOT NULL,
+        source TEXT NOT NULL,
+        PRIMARY KEY (season, seq)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_ledger_entries_manager
+    ON ledger_entries (season, manager_team, award, detail)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ledger_totals (
+        season TEXT NOT NULL,
+        manager_team TEXT NOT NULL,
+        awards_won INTEGER NOT NULL,
+        total_wc NUMERIC NOT NULL,
+        PRIMARY KEY (season, manager_team)
+    )
+    """,
+    # Leaderboard order, so the Tally page never sorts.
+    """
+    CREATE INDEX IF NOT EXISTS idx_ledger_totals_rank
+    ON ledger_totals (season, total_wc DESC, awards_won DESC, manager_team)
+    """,
+]
+
+
+def ledger_connection() -> sqlite3.Connection:
+    return db.connect(LEDGER_DB_PATH, LEDGER_MIGRATIONS)
+
+
+def save_ledger(ledger: Dict[str, Any]) -> None:
+    """
+    Replace one season's entries and totals in a single transaction.
+    """
+    season = ledger["season"]
+    metadata = {key: value for key, value in ledger.items() if key != "entries"}
+    rows = [
+        (season, seq, *(entry.get(column, "") for column in ENTRY_COLUMNS))
+        for seq, entry in enumerate(ledger.get("entries", []))
+    ]
+
+    with ledger_connection() as conn:
+        conn.execute("DELETE FROM ledger_entries WHERE season = ?", (season,))
+        conn.execute("DELETE FROM ledger_totals WHERE season = ?", (season,))
+        conn.executemany(
+            f"""
+            INSERT INTO ledger_entries (season, seq, {", ".join(ENTRY_COLUMNS)})
+            VALUES (?, ?, {", ".join("?" for _ in ENTRY_COLUMNS)})
+            """,
+            rows,
+        )
+        conn.execute(
+            """
+            INSERT INTO ledger_totals (season, manager_team, awards_won, total_wc)
+            SELECT season, manager_team, COUNT(*), SUM(wc)
+            FROM ledger_entries
+            WHERE season = ?
+            GROUP BY season, manager_team
+            """,
+            (season,),
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO ledger_seasons (season, league_id, currency, generated_at, metadata)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                season,
+                ledger.get("league_id"),
+                ledger.get("currency", "WC"),
+                ledger.get("generated_at"),
+                json.dumps(metadata, ensure_ascii=False),
+            ),
+        )
+
+
+def seasons() -> List[str]:
+    with ledger_connection() as conn:
+        rows = conn.execute("SELECT season FROM ledger_seasons ORDER BY season DESC").fetchall()
+    return [row["season"] for row in rows]
+
+
+def ledger_version(season: str) -> str:
+    """
+    Changes whenever the season is saved again; use it in cache keys.
+    """
+    with ledger_connection() as conn:
+        row = conn.execute(
+            "SELECT generated_at FROM ledger_seasons WHERE season = ?", (season,)
+        ).fetchone()
+    return (row["generated_at"] or "") if row else ""
+
+
+def season_totals(season: str) -> pd.DataFrame:
+    with ledger_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT manager_team, awards_won, total_wc
+            FROM ledger_totals
+            WHERE season = ?
+            ORDER BY total_wc DESC, awards_won DESC, manager_team ASC
+            """,
+            (season,),
+        ).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=TOTALS_COLUMNS)
+
+
+def season_entries(season: str) -> pd.DataFrame:
+    with ledger_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {", ".join(ENTRY_COLUMNS)}
+            FROM ledger_entries
+            WHERE season = ?
+            ORDER BY manager_team, award, detail, seq
+            """,
+            (season,),
+        ).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=ENTRY_COLUMNS)
+
+
+def manager_entries(season: str, manager_team: str) -> pd.DataFrame:
+    with ledger_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {", ".join(ENTRY_COLUMNS)}
+            FROM ledger_entries
+            WHERE season = ? AND manager_team = ?
+            ORDER BY award, detail, seq
+            """,
+            (season, manager_team),
+        ).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=ENTRY_COLUMNS)
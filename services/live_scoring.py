@@ -0,0 +1,465 @@
+# services/live_scoring.py
+"""
+Provisional scores for a gameweek that is still in play.
+
+Each manager's picks are fetched once after the deadline and stored
+permanently in gw_lineups (they cannot change after the deadline), so a
+refresh costs one event/live call and one fixtures call for the whole
+league. Scores are a row-wise dot product of lineup multipliers against live
+element points, after FPL's automatic substitutions, vice-captaincy and
+bench boost have been applied to the multipliers.
+
+Bonus points are included only once FPL adds them to `total_points`; no
+provisional bonus is estimated from BPS.
+
+The same stored lineups and per-GW element stats give the LPS goals
+tie-breakers for any GW (gameweek_goals), again without per-manager calls.
+"""
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import streamlit as st
+
+from services import http_cache
+from services.fpl_service import (
+    LIVE_TTL,
+    event_live_url,
+    fetch_bootstrap_static,
+    fetch_entry_event_picks_many,
+    fetch_event_live,
+    fetch_fixtures,
+    require_current,
+)
+from services.points_matrix import SeasonPointsMatrix, freeze_points_matrix
+from services.season_clock import season_clock
+from services.shared_data import SHARED_MAX_ENTRIES, DataVersion, data_version, freeze_array, league_table
+from services.snapshots import snapshot_connection
+
+SQUAD_SIZE = 15
+STARTERS = 11
+# Starters allowed per element_type in a valid formation (index = element_type).
+MIN_STARTERS = np.array([0, 1, 3, 2, 1])
+MAX_STARTERS = np.array([0, 1, 5, 5, 3])
+
+
+@dataclass(frozen=True)
+class Lineups:
+    """
+    Row i is `entries[i]`'s squad in pick order (slots 0-10 start, 11-14 are
+    the bench, 11 being the reserve goalkeeper).
+    """
+    entries: np.ndarray
+    elements: np.ndarray
+    captain: np.ndarray
+    vice: np.ndarray
+    captain_multiplier: np.ndarray
+    bench_boost: np.ndarray
+    transfer_cost: np.ndarray
+    missing: Tuple[int, ...]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+@dataclass(frozen=True)
+class ElementInfo:
+    """
+    Indexed by element id: element_type (1 GKP .. 4 FWD) and team id.
+    """
+    types: np.ndarray
+    teams: np.ndarray
+
+
+@dataclass(frozen=True)
+class LiveScores:
+    gw: int
+    entries: np.ndarray
+    raw: np.ndarray
+    minus: np.ndarray
+    multipliers: np.ndarray
+    missing: Tuple[int, ...]
+    updated_at: datetime
+
+    @property
+    def net(self) -> np.ndarray:
+        return self.raw - self.minus
+
+
+# -------- Lineup store --------
+
+def _lineup_row(payload: Mapping[str, Any]) -> Tuple[str, str | None, int] | None:
+    picks = sorted(payload.get("picks", []) or [], key=lambda pick: int(pick.get("position", 0)))
+    if len(picks) != SQUAD_SIZE:
+        return None
+    compact = [
+        {
+            "element": int(pick["element"]),
+            "multiplier": int(pick.get("multiplier", 0)),
+            "is_captain": bool(pick.get("is_captain")),
+            "is_vice_captain": bool(pick.get("is_vice_captain")),
+        }
+        for pick in picks
+    ]
+    transfer_cost = int((payload.get("entry_history") or {}).get("event_transfers_cost", 0))
+    return json.dumps(compact, separators=(",", ":")), payload.get("active_chip"), transfer_cost
+
+
+def capture_lineups(entry_ids: Sequence[int], gw: int) -> List[int]:
+    """
+    Fetch and permanently store the picks of every entry in `entry_ids` that
+    has none stored for `gw` yet. Only valid once the GW deadline has passed.
+    Returns the entries still without a lineup.
+    """
+    with snapshot_connection() as conn:
+        stored = {
+            int(row["entry"])
+            for row in conn.execute("SELECT entry FROM gw_lineups WHERE gw = ?", (gw,)).fetchall()
+        }
+    wanted = [int(entry) for entry in entry_ids if int(entry) not in stored]
+    if not wanted:
+        return []
+
+    batch = fetch_entry_event_picks_many(wanted, gw)
+    captured_at = datetime.now(timezone.utc).isoformat()
+    rows, missing = [], []
+    for entry in wanted:
+        lineup = _lineup_row(batch.results.get(entry) or {})
+        if lineup is None:
+            missing.append(entry)
+            continue
+        rows.append((entry, gw, *lineup, captured_at))
+
+    with snapshot_connection() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO gw_lineups (entry, gw, picks, active_chip, transfer_cost, captured_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    return missing
+
+
+def load_lineups(entry_ids: Sequence[int], gw: int) -> Lineups:
+    """
+    Stored lineups for `entry_ids`, in that order. Entries without one are
+    listed in `missing` and score zero.
+    """
+    with snapshot_connection() as conn:
+        stored = {
+            int(row["entry"]): row
+            for row in conn.execute(
+                "SELECT entry, picks, active_chip, transfer_cost FROM gw_lineups WHERE gw = ?", (gw,)
+            ).fetchall()
+        }
+
+    n = len(entry_ids)
+    elements = np.zeros((n, SQUAD_SIZE), dtype=np.int64)
+    captain = np.zeros(n, dtype=np.int64)
+    vice = np.zeros(n, dtype=np.int64)
+    captain_multiplier = np.full(n, 2, dtype=np.int64)
+    bench_boost = np.zeros(n, dtype=bool)
+    transfer_cost = np.zeros(n, dtype=np.int64)
+    missing = []
+
+    for i, entry in enumerate(entry_ids):
+        row = stored.get(int(entry))
+        if row is None:
+            missing.append(int(entry))
+            continue
+        picks = json.loads(row["picks"])
+        elements[i] = [pick["element"] for pick in picks]
+        captain[i] = next((slot for slot, pick in enumerate(picks) if pick["is_captain"]), 0)
+        vice[i] = next((slot for slot, pick in enumerate(picks) if pick["is_vice_captain"]), 0)
+        captain_multiplier[i] = 3 if row["active_chip"] == "3xc" else 2
+        bench_boost[i] = row["active_chip"] == "bboost"
+        transfer_cost[i] = int(row["transfer_cost"])
+
+    return Lineups(
+        entries=np.asarray([int(entry) for entry in entry_ids], dtype=np.int64),
+        elements=elements,
+        captain=captain,
+        vice=vice,
+        captain_multiplier=captain_multiplier,
+        bench_boost=bench_boost,
+        transfer_cost=transfer_cost,
+        missing=tuple(missing),
+    )
+
+
+# -------- Scoring --------
+
+def build_element_info(bootstrap: Mapping[str, Any]) -> ElementInfo:
+    elements = bootstrap.get("elements", []) or []
+    size = max((int(element["id"]) for element in elements), default=0) + 1
+    types = np.zeros(size, dtype=np.int64)
+    teams = np.zeros(size, dtype=np.int64)
+    for element in elements:
+        types[int(element["id"])] = int(element.get("element_type", 0))
+        teams[int(element["id"])] = int(element.get("team", 0))
+    return ElementInfo(types=types, teams=teams)
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def element_info() -> ElementInfo:
+    # FetchError propagates (and is not cached) instead of an empty player list.
+    return build_element_info(fetch_bootstrap_static())
+
+
+@dataclass(frozen=True)
+class ElementStats:
+    """
+    One GW's event/live stats as arrays indexed by element id (ids FPL did
+    not list score zero).
+    """
+    gw: int
+    points: np.ndarray
+    minutes: np.ndarray
+    goals_scored: np.ndarray
+    goals_conceded: np.ndarray
+
+
+def _take(values: np.ndarray, elements: np.ndarray) -> np.ndarray:
+    """
+    values[elements], with 0 for element ids past the end of `values`.
+    """
+    inside = elements < len(values)
+    return np.where(inside, values[np.where(inside, elements, 0)], 0)
+
+
+def build_element_stats(live: Mapping[str, Any], gw: int) -> ElementStats:
+    elements = live.get("elements", []) or []
+    size = max((int(element["id"]) for element in elements), default=0) + 1
+    columns = {
+        "total_points": np.zeros(size, dtype=np.int64),
+        "minutes": np.zeros(size, dtype=np.int64),
+        "goals_scored": np.zeros(size, dtype=np.int64),
+        "goals_conceded": np.zeros(size, dtype=np.int64),
+    }
+    for element in elements:
+        stats = element.get("stats") or {}
+        for name, values in columns.items():
+            values[int(element["id"])] = int(stats.get(name, 0) or 0)
+    return ElementStats(
+        gw=gw,
+        points=freeze_array(columns["total_points"]),
+        minutes=freeze_array(columns["minutes"]),
+        goals_scored=freeze_array(columns["goals_scored"]),
+        goals_conceded=freeze_array(columns["goals_conceded"]),
+    )
+
+
+@st.cache_resource(max_entries=http_cache.SEASON_GWS, show_spinner=False)
+def _final_element_stats(gw: int) -> ElementStats:
+    # Kept for the life of the process, so only a current payload will do:
+    # FetchError (never cached) rather than stale or empty stats.
+    return build_element_stats(require_current(event_live_url(gw), max_age=LIVE_TTL), gw)
+
+
+@st.cache_resource(ttl=LIVE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _live_element_stats(gw: int, live_bucket: int) -> ElementStats:
+    return build_element_stats(fetch_event_live(gw), gw)
+
+
+def element_stats(gw: int) -> ElementStats:
+    """
+    event/live stats for `gw`: parsed once per process for final GWs, every
+    LIVE_TTL seconds while the GW can still change. Raises FetchError when a
+    final GW's stats cannot be fetched.
+    """
+    if season_clock().is_final(gw):
+        return _final_element_stats(gw)
+    return _live_element_stats(gw, int(time.time() // LIVE_TTL))
+
+
+def _teams_done(fixtures: Sequence[Mapping[str, Any]], size: int) -> np.ndarray:
+    """
+    Per team id: True once every fixture it plays this GW is over (teams
+    without a fixture are done from the start).
+    """
+    done = np.ones(size, dtype=bool)
+    for fixture in fixtures:
+        over = bool(fixture.get("finished") or fixture.get("finished_provisional"))
+        for side in ("team_h", "team_a"):
+            team = int(fixture.get(side) or 0)
+            if 0 < team < size:
+                done[team] &= over
+    return done
+
+
+def lineup_multipliers(
+    lineups: Lineups, types: np.ndarray, played: np.ndarray, absent: np.ndarray
+) -> np.ndarray:
+    """
+    Final multipliers per squad slot. `types`, `played` and `absent` are
+    n × 15 (absent: did not play and can no longer play). Applies automatic
+    substitutions in bench order while keeping a valid formation, bench boost
+    and the vice-captain taking the armband from an absent captain.
+    """
+    n = len(lineups)
+    rows = np.arange(n)
+    active = np.zeros((n, SQUAD_SIZE), dtype=bool)
+    active[:, :STARTERS] = True
+    subs = ~lineups.bench_boost
+
+    # Goalkeeper: only the reserve goalkeeper can come on.
+    gk_swap = subs & absent[:, 0] & played[:, STARTERS]
+    active[gk_swap, 0] = False
+    active[gk_swap, STARTERS] = True
+
+    for bench in range(STARTERS + 1, SQUAD_SIZE):
+        available = subs & played[:, bench]
+        bench_type = types[:, bench]
+        bench_type_active = (active & (types == bench_type[:, None])).sum(axis=1)
+        chosen = np.full(n, -1)
+        for slot in range(1, STARTERS):
+            slot_type = types[:, slot]
+            slot_type_active = (active & (types == slot_type[:, None])).sum(axis=1)
+            keeps_formation = (bench_type == slot_type) | (
+                (slot_type_active - 1 >= MIN_STARTERS[slot_type])
+                & (bench_type_active + 1 <= MAX_STARTERS[bench_type])
+            )
+            candidate = available & (chosen < 0) & active[:, slot] & absent[:, slot] & keeps_formation
+            chosen[candidate] = slot
+        swapped = np.flatnonzero(chosen >= 0)
+        active[swapped, chosen[swapped]] = False
+        active[swapped, bench] = True
+
+    active[lineups.bench_boost] = True
+    multipliers = active.astype(np.int64)
+
+    captain_out = absent[rows, lineups.captain] | ~active[rows, lineups.captain]
+    use_vice = captain_out & active[rows, lineups.vice] & played[rows, lineups.vice]
+    armband = np.where(use_vice, lineups.vice, lineups.captain)
+    wears = active[rows, armband]
+    multipliers[rows[wears], armband[wears]] = lineups.captain_multiplier[wears]
+    return multipliers
+
+
+def score_lineups(
+    lineups: Lineups,
+    stats: ElementStats,
+    fixtures: Sequence[Mapping[str, Any]],
+    info: ElementInfo,
+) -> LiveScores:
+    elements = lineups.elements
+    types = _take(info.types, elements)
+    teams = _take(info.teams, elements)
+    done = _teams_done(fixtures, max(int(info.teams.max(initial=0)) + 1, 1))
+
+    played = _take(stats.minutes, elements) > 0
+    absent = ~played & done[teams]
+    multipliers = lineup_multipliers(lineups, types, played, absent)
+
+    has_lineup = ~np.isin(lineups.entries, np.asarray(lineups.missing, dtype=np.int64))
+    raw = np.where(has_lineup, (multipliers * _take(stats.points, elements)).sum(axis=1), 0)
+    minus = np.where(has_lineup, lineups.transfer_cost, 0)
+    return LiveScores(
+        gw=stats.gw,
+        entries=lineups.entries,
+        raw=raw,
+        minus=minus,
+        multipliers=multipliers,
+        missing=lineups.missing,
+        updated_at=datetime.now(timezone.utc),
+    )
+
+
+@st.cache_resource(ttl=3600, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _league_lineups(league_id: int, gw: int, version: DataVersion) -> Lineups:
+    entry_ids = league_table(league_id, version).entries.tolist()
+    capture_lineups(entry_ids, gw)
+    return load_lineups(entry_ids, gw)
+
+
+@st.cache_resource(ttl=LIVE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _live_scores(league_id: int, gw: int, version: DataVersion, live_bucket: int) -> LiveScores:
+    lineups = _league_lineups(league_id, gw, version)
+    return score_lineups(lineups, _live_element_stats(gw, live_bucket), fetch_fixtures(gw), element_info())
+
+
+def live_scores(league_id: int, gw: int) -> LiveScores:
+    """
+    Provisional scores for every manager in the league, refreshed every LIVE_TTL seconds.
+    Raises FetchError when the live stats, fixtures or player list cannot be
+    fetched; nothing is scored from partial data.
+    """
+    deadline = season_clock().deadline(gw)
+    if deadline is None or deadline > datetime.now(timezone.utc):
+        raise ValueError(f"GW{gw} has not reached its deadline yet")
+    return _live_scores(league_id, gw, data_version(), int(time.time() // LIVE_TTL))
+
+
+# -------- Tie-breaker stats --------
+
+@dataclass(frozen=True)
+class StartingXIGoals:
+    """
+    Goals scored and conceded in `gw` by each manager's picked starting XI
+    (slots 0-10, before automatic substitutions). Entries without a stored
+    lineup are listed in `missing` and count zero.
+    """
+    gw: int
+    entries: np.ndarray
+    scored: np.ndarray
+    conceded: np.ndarray
+    missing: Tuple[int, ...]
+    index: Mapping[int, int]
+
+    def for_entry(self, entry_id: int) -> Tuple[int, int]:
+        i = self.index[int(entry_id)]
+        return int(self.scored[i]), int(self.conceded[i])
+
+
+def starting_xi_goals(lineups: Lineups, stats: ElementStats) -> StartingXIGoals:
+    xi = lineups.elements[:, :STARTERS]
+    return StartingXIGoals(
+        gw=stats.gw,
+        entries=lineups.entries,
+        scored=_take(stats.goals_scored, xi).sum(axis=1),
+        conceded=_take(stats.goals_conceded, xi).sum(axis=1),
+        missing=lineups.missing,
+        index=MappingProxyType({int(entry): i for i, entry in enumerate(lineups.entries)}),
+    )
+
+
+def gameweek_goals(entry_ids: Sequence[int], gw: int) -> StartingXIGoals:
+    """
+    LPS goals tie-breakers for `entry_ids` in `gw`, from stored lineups
+    (captured on first use, for these entries only) and the GW's cached
+    event/live stats. Raises FetchError when those stats cannot be fetched.
+    """
+    capture_lineups(entry_ids, gw)
+    return starting_xi_goals(load_lineups(entry_ids, gw), element_stats(gw))
+
+
+def with_live_gw(matrix: SeasonPointsMatrix, scores: LiveScores) -> SeasonPointsMatrix:
+    """
+    Copy of `matrix` whose `scores.gw` column holds the provisional scores, so
+    finished-GW code (Slammers, LPS) can rank a live GW unchanged.
+    """
+    rows = matrix.rows(scores.entries)
+    col = scores.gw - 1
+    raw = matrix.raw.copy()
+    minus = matrix.minus.copy()
+    played = matrix.played.copy()
+    raw[rows, col] = scores.raw
+    minus[rows, col] = scores.minus
+    scored = ~np.isin(scores.entries, np.asarray(scores.missing, dtype=np.int64))
+    played[rows, col] = scored
+    return freeze_points_matrix(
+        SeasonPointsMatrix(
+            entries=matrix.entries,
+            raw=raw,
+            minus=minus,
+            total=matrix.total,
+            played=played,
+            index=matrix.index,
+            failed=sorted(set(matrix.failed) | set(scores.missing)),
+        )
+    )
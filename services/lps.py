@@ -1,6 +1,15 @@
 # services/lps.py
-from typing import Dict, List, Any, Tuple
 import random
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, Set, Tuple
+
+from services.fpl_service import FetchError
+from services.live_scoring import gameweek_goals
+from services.points_matrix import SeasonPointsMatrix, season_points_matrix
+from services.season_clock import season_clock
+from services.shared_data import league_standings
+from services.snapshots import snapshot_connection
 
 LPS_STARTERS = 96
 
@@ -52,18 +61,330 @@ def coin_toss_seeded(items: List[Any], gw: int) -> List[Any]:
 def sort_key_for_bottom_cut(
     net_points: int,
     overall_rank: int,
-    minus_points: int
-) -> Tuple[int, int, int]:
+    minus_points: int,
+    goals_scored: int = 0,
+    goals_conceded: int = 0,
+) -> Tuple[int, int, int, int, int]:
     """
     Sort ascending by elimination priority:
     1) Fewest net points (worse first)
-    2) Worst overall rank (bigger number is worse) -> descending => use negative sign trick by returning -rank? No:
-       We want worse first, so key should put larger rank earlier => use rank directly but invert overall sort sense by providing it as (+rank)
-    3) More minus points (worse first)
+    2) Overall rank, ascending (as the bottom cut has always been ordered)
+    3) More minus points (worse first) -> negated so larger hits sort earlier
+    4) Fewest goals scored by the starting XI (worse first)
+    5) Most goals conceded by the starting XI (worse first) -> negated
+    """
+    return (net_points, overall_rank, -minus_points, goals_scored, -goals_conceded)
+
+
+class TieBreakUnavailable(Exception):
+    """
+    The goals tie-breakers are needed for `entries` (tied at the cut-off) but
+    their GW lineups (`what`="picks") or the GW's player stats could not be
+    fetched.
+    """
+    def __init__(self, gw: int, entries: List[int], what: str = "picks"):
+        super().__init__(f"No GW{gw} {what} for {len(entries)} manager(s) tied at the LPS cut-off")
+        self.gw = gw
+        self.entries = entries
+
+
+# Goals scored / conceded by each listed entry's starting XI.
+GoalsLookup = Callable[[List[int]], Mapping[int, Tuple[int, int]]]
+
+
+def _rank_minus_key(row: Dict[str, Any]) -> Tuple[int, int]:
+    return (-row["OverallRank"], -row["MinusPoints"])
+
+
+def _goals_key(row: Dict[str, Any]) -> Tuple[int, int]:
+    return (row["GoalsScored"], -row["GoalsConceded"])
+
+
+def _fill_slots(
+    group: List[Dict[str, Any]], slots: int, key: Callable[[Dict[str, Any]], Any]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split `group`, ordered by `key`, into the rows that certainly take one of
+    `slots` places and the rows level on `key` at the last place.
     """
-    return (net_points, overall_rank, -(-minus_points))  # same as (net_points, overall_rank, minus_points)
+    group = sorted(group, key=key)
+    cut_key = key(group[slots - 1])
+    ahead = [r for r in group if key(r) < cut_key]
+    level = [r for r in group if key(r) == cut_key]
+    return ahead, level
+
+
+def eliminate_for_gw(
+    rows: List[Dict[str, Any]], n_elim: int, gw: int, goals: GoalsLookup | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Pick the `n_elim` managers eliminated in `gw` from the survivors' rows
+    (keys: entry, NetPoints, OverallRank, MinusPoints, ...).
+
+    Everyone strictly below the cut-off score goes out; remaining slots are
+    filled from the group tied on the cut-off score, ordered by worst overall
+    rank and most minus points. Only when managers level on those straddle
+    the last slot are `goals` looked up, for just those managers (fewest
+    scored, then most conceded go first); whoever is still level goes to a
+    seeded coin toss. Without `goals` the coin toss follows rank and minus.
+    """
+    if n_elim <= 0 or not rows:
+        return []
+
+    ordered = sorted(
+        rows,
+        key=lambda r: sort_key_for_bottom_cut(r["NetPoints"], r["OverallRank"], r["MinusPoints"]),
+    )
+    threshold = ordered[min(n_elim, len(ordered)) - 1]["NetPoints"]
+    bottom_block = [r for r in ordered if r["NetPoints"] <= threshold]
+
+    strict_out = [r for r in bottom_block if r["NetPoints"] < threshold]
+    remaining_slots = max(0, n_elim - len(strict_out))
+    tied_group = [r for r in bottom_block if r["NetPoints"] == threshold]
+
+    eliminated = list(strict_out)
+    if remaining_slots <= 0 or not tied_group:
+        return eliminated
+    if remaining_slots >= len(tied_group):
+        return eliminated + sorted(tied_group, key=_rank_minus_key)[:remaining_slots]
+
+    ahead, level = _fill_slots(tied_group, remaining_slots, _rank_minus_key)
+    eliminated.extend(ahead)
+    remaining_slots -= len(ahead)
+    if goals is not None and len(level) > remaining_slots:
+        tied_goals = goals([int(r["entry"]) for r in level])
+        level = [
+            {**r, "GoalsScored": tied_goals[int(r["entry"])][0], "GoalsConceded": tied_goals[int(r["entry"])][1]}
+            for r in level
+        ]
+        ahead, level = _fill_slots(level, remaining_slots, _goals_key)
+        eliminated.extend(ahead)
+        remaining_slots -= len(ahead)
+    return eliminated + coin_toss_seeded(level, gw)[:remaining_slots]
+
+
+def gameweek_goals_lookup(gw: int) -> GoalsLookup:
+    """
+    GoalsLookup for `gw` from stored lineups, fetching only the listed
+    entries' picks. Raises TieBreakUnavailable if any of them is missing or
+    the GW's event/live stats cannot be fetched.
+    """
+    def lookup(entries: List[int]) -> Mapping[int, Tuple[int, int]]:
+        try:
+            goals = gameweek_goals(entries, gw)
+        except FetchError as e:
+            raise TieBreakUnavailable(gw, entries, "event/live stats") from e
+        if goals.missing:
+            raise TieBreakUnavailable(gw, list(goals.missing))
+        return {entry: goals.for_entry(entry) for entry in entries}
+
+    return lookup
+
 
-# NOTE on goals scored/conceded tie-breakers:
-# We skip them for now because they require per-player live stats aggregation.
-# If ties remain after minus_points, we fall back to deterministic coin toss.
-# redeploy trigger
+# -------- Persisted elimination engine --------
+# The elimination log is stored per (league, GW) in the snapshot database. Each
+# run only computes gameweeks after the last stored one; any GW is then a
+# lookup. The LPS page and the winners ledger both read from here.
+
+def last_computed_gw(league_id: int) -> int:
+    with snapshot_connection() as conn:
+        row = conn.execute(
+            "SELECT MAX(gw) AS gw FROM lps_gameweeks WHERE league_id = ?",
+            (league_id,),
+        ).fetchone()
+    return int(row["gw"] or 0)
+
+
+def _eliminated_entries(conn: sqlite3.Connection, league_id: int, through_gw: int) -> Set[int]:
+    rows = conn.execute(
+        "SELECT entry FROM lps_eliminations WHERE league_id = ? AND gw <= ?",
+        (league_id, through_gw),
+    ).fetchall()
+    return {int(row["entry"]) for row in rows}
+
+
+def _survivor_row(entry_id: int, standing: Dict[str, Any], points: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "entry": entry_id,
+        "Manager": standing.get("player_name", ""),
+        "Team": standing.get("entry_name", ""),
+        "OverallRank": int(standing.get("rank", 10**9)),
+        "OverallPoints": int(standing.get("total", 0)),
+        "RawPoints": int(points["raw_points"]),
+        "MinusPoints": int(points["minus_points"]),
+        "NetPoints": int(points["net_points"]),
+    }
+
+
+def update_lps_log(
+    league_id: int,
+    through_gw: int,
+    standings: List[Dict[str, Any]] | None = None,
+    matrix: SeasonPointsMatrix | None = None,
+) -> int:
+    """
+    Compute and store eliminations for every GW after the last stored one up
+    to `through_gw`. Stops early, without storing, at the first GW that is not
+    final yet (season_clock().is_final) or where any survivor has no points
+    for that GW (failed fetch, or a stale history without the GW). Returns
+    the last GW now stored. `standings` and `matrix` are fetched when not
+    given.
+    """
+    start_gw = last_computed_gw(league_id) + 1
+    if start_gw > through_gw:
+        return start_gw - 1
+
+    if standings is None:
+        standings = league_standings(league_id)
+    if matrix is None:
+        matrix = season_points_matrix(league_id)
+    idx_by_entry = {int(row["entry"]): row for row in standings}
+    failed = set(matrix.failed)
+
+    with snapshot_connection() as conn:
+        eliminated_so_far = _eliminated_entries(conn, league_id, start_gw - 1)
+    survivors = [entry for entry in idx_by_entry if entry not in eliminated_so_far]
+
+    clock = season_clock()
+    for gw in range(start_gw, through_gw + 1):
+        if not clock.is_final(gw):
+            # Bonus and corrections can still land; stored GWs are never recomputed.
+            print(f"⚠️ LPS GW{gw} not stored: FPL has not confirmed its points yet")
+            return gw - 1
+        n_elim = elimination_schedule(gw)
+        eliminated: List[Dict[str, Any]] = []
+        if n_elim > 0 and len(survivors) > 1:
+            # A stale or short history scores 0 for the GW: treat it as missing, never as a score.
+            missing = [
+                entry
+                for entry in survivors
+                if entry in failed or entry not in matrix.index or not matrix.played[matrix.row(entry), gw - 1]
+            ]
+            if missing:
+                print(f"⚠️ LPS GW{gw} not computed: no GW{gw} points for {len(missing)} survivor(s)")
+                return gw - 1
+            rows = [
+                _survivor_row(entry, idx_by_entry[entry], matrix.points(entry, gw))
+                for entry in survivors
+            ]
+            try:
+                eliminated = eliminate_for_gw(rows, n_elim, gw, gameweek_goals_lookup(gw))
+            except TieBreakUnavailable as e:
+                print(f"⚠️ LPS GW{gw} not computed: {e}")
+                return gw - 1
+
+        out = {int(row["entry"]) for row in eliminated}
+        survivors = [entry for entry in survivors if entry not in out]
+        _save_gameweek(league_id, gw, eliminated, len(survivors))
+
+    return through_gw
+
+
+def _save_gameweek(league_id: int, gw: int, eliminated: List[Dict[str, Any]], survivors: int) -> None:
+    computed_at = datetime.now(timezone.utc).isoformat()
+    with snapshot_connection() as conn:
+        conn.execute(
+            "DELETE FROM lps_eliminations WHERE league_id = ? AND gw = ?",
+            (league_id, gw),
+        )
+        conn.executemany(
+            """
+            INSERT INTO lps_eliminations
+                (league_id, gw, elim_order, entry, player_name, entry_name,
+                 raw_points, minus_points, net_points, overall_points, overall_rank)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    league_id,
+                    gw,
+                    order,
+                    int(row["entry"]),
+                    row["Manager"],
+                    row["Team"],
+                    row["RawPoints"],
+                    row["MinusPoints"],
+                    row["NetPoints"],
+                    row["OverallPoints"],
+                    row["OverallRank"],
+                )
+                for order, row in enumerate(eliminated, start=1)
+            ],
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO lps_gameweeks (league_id, gw, survivors, computed_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (league_id, gw, survivors, computed_at),
+        )
+
+
+def lps_eliminations(league_id: int, gw: int) -> List[Dict[str, Any]]:
+    """
+    Stored eliminations for one GW, in elimination order.
+    """
+    with snapshot_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT entry, player_name, entry_name, raw_points, minus_points,
+                   net_points, overall_points, overall_rank
+            FROM lps_eliminations
+            WHERE league_id = ? AND gw = ?
+            ORDER BY elim_order ASC
+            """,
+            (league_id, gw),
+        ).fetchall()
+
+    return [
+        {
+            "entry": int(row["entry"]),
+            "Manager": row["player_name"],
+            "Team": row["entry_name"],
+            "RawPoints": int(row["raw_points"]),
+            "MinusPoints": int(row["minus_points"]),
+            "NetPoints": int(row["net_points"]),
+            "OverallPoints": int(row["overall_points"]),
+            "OverallRank": int(row["overall_rank"]),
+        }
+        for row in rows
+    ]
+
+
+def lps_survivors(league_id: int, gw: int, entries: List[int]) -> List[int]:
+    """
+    Which of `entries` (the league's managers) are still standing after `gw`.
+    """
+    with snapshot_connection() as conn:
+        eliminated = _eliminated_entries(conn, league_id, gw)
+    return [int(entry) for entry in entries if int(entry) not in eliminated]
+
+
+def provisional_eliminations(
+    league_id: int,
+    gw: int,
+    standings: List[Dict[str, Any]],
+    matrix: SeasonPointsMatrix,
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Who would go out in `gw` if it ended now, from a matrix whose `gw` column
+    holds live or not yet confirmed scores (services.live_scoring.with_live_gw
+    or the season matrix). Nothing is stored; the log must already reach
+    `gw` - 1 (update_lps_log).
+    Returns the eliminated rows and the survivors going into `gw`; survivors
+    in `matrix.failed` are left out of the cut.
+    """
+    idx_by_entry = {int(row["entry"]): row for row in standings}
+    survivors = [entry for entry in lps_survivors(league_id, gw - 1, list(idx_by_entry)) if entry in matrix.index]
+    n_elim = elimination_schedule(gw)
+    if n_elim <= 0 or len(survivors) <= 1:
+        return [], survivors
+    # Survivors without points data are reported by the page, not ranked as 0.
+    failed = set(matrix.failed)
+    scored = [entry for entry in survivors if entry not in failed]
+    rows = [_survivor_row(entry, idx_by_entry[entry], matrix.points(entry, gw)) for entry in scored]
+    try:
+        return eliminate_for_gw(rows, n_elim, gw, gameweek_goals_lookup(gw)), survivors
+    except TieBreakUnavailable as e:
+        print(f"⚠️ LPS GW{gw} provisional cut without goals tie-breakers: {e}")
+        return eliminate_for_gw(rows, n_elim, gw), survivors
@@ -0,0 +1,56 @@
+# services/negative_cache.py
+"""
+Short-lived memory of failed fetches.
+
+A URL that just failed is answered as failed for `ttl` seconds instead of
+sending every session and worker thread back to an API that is down or
+throttling. Each failure in a row is counted so the background retries can
+back off and stop; a success forgets the URL.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable
+
+
+@dataclass
+class _Failure:
+    failed_at: float
+    attempts: int
+
+
+class NegativeCache:
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._failures: Dict[Hashable, _Failure] = {}
+        self.hits = 0
+
+    def recent(self, key: Hashable) -> bool:
+        """
+        Whether `key` failed less than `ttl` seconds ago.
+        """
+        with self._lock:
+            failure = self._failures.get(key)
+            if failure is None or time.monotonic() - failure.failed_at >= self.ttl:
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, key: Hashable) -> int:
+        """
+        Record a failure for `key`; returns how many times in a row it has failed.
+        """
+        with self._lock:
+            failure = self._failures.get(key)
+            attempts = failure.attempts + 1 if failure else 1
+            self._failures[key] = _Failure(time.monotonic(), attempts)
+            return attempts
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"failing": len(self._failures), "hits": self.hits}
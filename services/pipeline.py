@@ -0,0 +1,130 @@
+# services/pipeline.py
+"""
+Small dependency-graph executor: each stage runs as soon as the stages it
+depends on have finished, independent stages run concurrently on a worker
+pool, and every stage's wall time is recorded. content_hash fingerprints
+stage inputs so callers can skip stages whose inputs have not changed.
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    `fn` is called with one keyword argument per dependency, named after the
+    dependency stage and holding that stage's result.
+    """
+    name: str
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+
+
+def _check_graph(stages: Sequence[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate stage names")
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in known]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stage(s): {missing}")
+
+    # Kahn's algorithm: every stage must become runnable.
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(stages: Sequence[Stage], max_workers: int = 4) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run every stage once. Returns (results by stage name, seconds by stage
+    name). The first stage to raise stops scheduling and re-raises.
+    """
+    _check_graph(stages)
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    pending: List[Stage] = list(stages)
+    running: Dict[Future, Stage] = {}
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(stage: Stage) -> Any:
+        started = time.perf_counter()
+        try:
+            return stage.fn(**{dep: results[dep] for dep in stage.deps})
+        finally:
+            timings[stage.name] = round(time.perf_counter() - started, 3)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers),
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as pool:
+        while pending or running:
+            ready = [stage for stage in pending if all(dep in results for dep in stage.deps)]
+            for stage in ready:
+                pending.remove(stage)
+                running[pool.submit(run, stage)] = stage
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise error
+                results[stage.name] = future.result()
+
+    return results, timings
+
+
+def _update_digest(digest: "hashlib._Hash", value: Any) -> None:
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype}:{value.shape};".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif is_dataclass(value) and not isinstance(value, type):
+        digest.update(f"{type(value).__name__}(".encode())
+        for field in fields(value):
+            digest.update(f"{field.name}=".encode())
+            _update_digest(digest, getattr(value, field.name))
+        digest.update(b")")
+    elif isinstance(value, Mapping):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            digest.update(f"{key!r}:".encode())
+            _update_digest(digest, value[key])
+            digest.update(b",")
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _update_digest(digest, item)
+            digest.update(b",")
+        digest.update(b"]")
+    else:
+        digest.update(json.dumps(value, default=str).encode())
+
+
+def content_hash(*values: Any) -> str:
+    """
+    Stable SHA-256 of plain data, NumPy arrays and dataclasses of either.
+    Mapping order does not matter; list order does.
+    """
+    digest = hashlib.sha256()
+    for value in values:
+        _update_digest(digest, value)
+    return digest.hexdigest()
@@ -0,0 +1,198 @@
+# services/points_matrix.py
+"""
+Season points matrix: every manager's raw, minus and net points for every GW,
+built from one entry-history call per manager instead of one picks call per
+manager per gameweek.
+
+`history["current"][i]["points"]` is the same RAW GW score that
+`entry_history["points"]` carries in the picks payload, and
+`event_transfers_cost` is the same hit, so the matrix agrees with
+compute_net_points for every entry and GW.
+
+Entries whose history could not be fetched are listed in `failed` (their
+rows are zero and never `played`); callers report them rather than score
+them. season_points_matrix() patches in just those rows once a retry
+succeeds.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping
+
+import numpy as np
+import streamlit as st
+
+from services.delta_sync import refetch_histories, stored_histories
+from services.fpl_service import CACHE_TTL
+from services.shared_data import (
+    SHARED_MAX_ENTRIES,
+    DataVersion,
+    current_histories,
+    data_version,
+    freeze_array,
+    league_histories,
+    league_table,
+    retry_bucket,
+)
+
+SEASON_GWS = 38
+
+
+@dataclass(frozen=True)
+class SeasonPointsMatrix:
+    """
+    entries × GW arrays; row i belongs to `entries[i]`, column gw - 1 to GW `gw`.
+    GWs missing from a manager's history score 0 and are False in `played`.
+    `total` is the official cumulative total_points after each GW.
+    """
+    entries: np.ndarray
+    raw: np.ndarray
+    minus: np.ndarray
+    total: np.ndarray
+    played: np.ndarray
+    index: Dict[int, int]
+    failed: List[int]
+
+    @property
+    def net(self) -> np.ndarray:
+        return self.raw - self.minus
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def row(self, entry_id: int) -> int:
+        return self.index[int(entry_id)]
+
+    def rows(self, entry_ids) -> np.ndarray:
+        return np.fromiter((self.index[int(e)] for e in entry_ids), dtype=np.int64)
+
+    def gw_raw(self, gw: int) -> np.ndarray:
+        return self.raw[:, gw - 1]
+
+    def gw_minus(self, gw: int) -> np.ndarray:
+        return self.minus[:, gw - 1]
+
+    def gw_net(self, gw: int) -> np.ndarray:
+        return self.raw[:, gw - 1] - self.minus[:, gw - 1]
+
+    def points(self, entry_id: int, gw: int) -> Dict[str, int]:
+        """
+        Same shape as compute_net_points: raw_points, minus_points, net_points.
+        """
+        i = self.row(entry_id)
+        raw_points = int(self.raw[i, gw - 1])
+        minus_points = int(self.minus[i, gw - 1])
+        return {
+            "raw_points": raw_points,
+            "minus_points": minus_points,
+            "net_points": raw_points - minus_points,
+        }
+
+
+def build_points_matrix(
+    entry_ids: List[int], histories: Mapping[int, Dict[str, Any]], failed: List[int] | None = None
+) -> SeasonPointsMatrix:
+    entries = np.asarray([int(entry_id) for entry_id in entry_ids], dtype=np.int64)
+    shape = (len(entries), SEASON_GWS)
+    raw = np.zeros(shape, dtype=np.int32)
+    minus = np.zeros(shape, dtype=np.int32)
+    total = np.zeros(shape, dtype=np.int32)
+    played = np.zeros(shape, dtype=bool)
+
+    for i, entry_id in enumerate(entries):
+        for gw_row in (histories.get(int(entry_id)) or {}).get("current", []) or []:
+            gw = int(gw_row.get("event", 0))
+            if not 1 <= gw <= SEASON_GWS:
+                continue
+            raw[i, gw - 1] = int(gw_row.get("points", 0))
+            minus[i, gw - 1] = int(gw_row.get("event_transfers_cost", 0))
+            total[i, gw - 1] = int(gw_row.get("total_points", 0))
+            played[i, gw - 1] = True
+
+    return SeasonPointsMatrix(
+        entries=entries,
+        raw=raw,
+        minus=minus,
+        total=total,
+        played=played,
+        index={int(entry_id): i for i, entry_id in enumerate(entries)},
+        failed=list(failed or []),
+    )
+
+
+def patch_points_matrix(
+    matrix: SeasonPointsMatrix, histories: Mapping[int, Dict[str, Any]], failed: List[int]
+) -> SeasonPointsMatrix:
+    """
+    Copy of `matrix` with the rows of `histories`' entries rebuilt and
+    `failed` as the entries still missing.
+    """
+    patch = build_points_matrix(list(histories), histories)
+    rows = matrix.rows(patch.entries)
+    raw, minus, total, played = matrix.raw.copy(), matrix.minus.copy(), matrix.total.copy(), matrix.played.copy()
+    raw[rows], minus[rows], total[rows], played[rows] = patch.raw, patch.minus, patch.total, patch.played
+    return SeasonPointsMatrix(
+        entries=matrix.entries,
+        raw=raw,
+        minus=minus,
+        total=total,
+        played=played,
+        index=matrix.index,
+        failed=list(failed),
+    )
+
+
+def freeze_points_matrix(matrix: SeasonPointsMatrix) -> SeasonPointsMatrix:
+    """
+    The same matrix with read-only arrays, safe to share between sessions.
+    """
+    for values in (matrix.entries, matrix.raw, matrix.minus, matrix.total, matrix.played):
+        freeze_array(values)
+    return matrix
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def shared_points_matrix(league_id: int, version: DataVersion) -> SeasonPointsMatrix:
+    table = league_table(league_id, version)
+    histories = league_histories(league_id, version)
+    matrix = build_points_matrix(table.entries.tolist(), histories.histories, list(histories.failed))
+    return freeze_points_matrix(matrix)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _repaired_points_matrix(league_id: int, version: DataVersion, bucket: int) -> SeasonPointsMatrix:
+    base = shared_points_matrix(league_id, version)
+    histories = current_histories(league_id, version)
+    recovered = {entry: histories.histories[entry] for entry in base.failed if entry not in histories.failed}
+    return freeze_points_matrix(patch_points_matrix(base, recovered, list(histories.failed)))
+
+
+def current_points_matrix(league_id: int, version: DataVersion) -> SeasonPointsMatrix:
+    """
+    shared_points_matrix with failed rows retried once per retry_bucket().
+    """
+    base = shared_points_matrix(league_id, version)
+    if not base.failed:
+        return base
+    return _repaired_points_matrix(league_id, version, retry_bucket())
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def synced_points_matrix(league_id: int, gw: int, version: DataVersion) -> SeasonPointsMatrix:
+    """
+    Points matrix for the GW that has just finished (still FPL's current GW).
+    Stored histories that already agree with the standings' totals are used
+    as they are; only the rest are refetched, so raw points and hits always
+    come from the history rows.
+    """
+    table = league_table(league_id, version)
+    histories, changed = stored_histories(table.rows, gw)
+    refetched, failed = refetch_histories(changed)
+    histories.update(refetched)
+    return freeze_points_matrix(build_points_matrix(table.entries.tolist(), histories, failed))
+
+
+def season_points_matrix(league_id: int) -> SeasonPointsMatrix:
+    """
+    Points matrix for every manager in the league, rows in standings order.
+    One read-only instance per data version is shared by every session.
+    """
+    return current_points_matrix(league_id, data_version())
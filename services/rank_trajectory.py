@@ -0,0 +1,137 @@
+# services/rank_trajectory.py
+"""
+Rank trajectory index over the stored league_rank_snapshots: a dense
+entries × GW array of official Big Whammy ranks, so rank movement between any
+two gameweeks is one vectorized subtraction.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.points_matrix import SEASON_GWS
+from services.snapshots import snapshot_connection
+
+MISSING_RANK = 0
+
+
+@dataclass(frozen=True)
+class RankTrajectory:
+    """
+    Row i belongs to `entries[i]`, column gw - 1 to GW `gw`. GWs without a
+    stored snapshot for a manager hold MISSING_RANK.
+    """
+    entries: np.ndarray
+    ranks: np.ndarray
+    totals: np.ndarray
+    player_names: List[str]
+    entry_names: List[str]
+
+    def has_gw(self, gw: int) -> bool:
+        return 1 <= gw <= SEASON_GWS and bool((self.ranks[:, gw - 1] != MISSING_RANK).any())
+
+    @property
+    def gws(self) -> List[int]:
+        return [gw for gw in range(1, SEASON_GWS + 1) if self.has_gw(gw)]
+
+    def gain(self, from_gw: int, to_gw: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ranks gained by every manager from `from_gw` to `to_gw` (positive is a
+        climb), plus a mask of managers ranked in both gameweeks.
+        """
+        start = self.ranks[:, from_gw - 1]
+        end = self.ranks[:, to_gw - 1]
+        valid = (start != MISSING_RANK) & (end != MISSING_RANK)
+        return np.where(valid, start - end, 0), valid
+
+    def window_extremes(self, from_gw: int, to_gw: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Each manager's biggest climb and biggest slide between any two
+        gameweeks inside [from_gw, to_gw] (earlier GW first), ignoring gaps.
+        """
+        window = self.ranks[:, from_gw - 1:to_gw].astype(float)
+        window[window == MISSING_RANK] = np.nan
+        worst_so_far = np.fmax.accumulate(np.nan_to_num(window, nan=-np.inf), axis=1)
+        best_so_far = np.fmin.accumulate(np.nan_to_num(window, nan=np.inf), axis=1)
+        climbs = np.nan_to_num(np.nanmax(worst_so_far - window, axis=1, initial=0), nan=0)
+        slides = np.nan_to_num(np.nanmax(window - best_so_far, axis=1, initial=0), nan=0)
+        return climbs.astype(int), slides.astype(int)
+
+    def movement_table(self, from_gw: int, to_gw: int) -> pd.DataFrame:
+        gains, valid = self.gain(from_gw, to_gw)
+        rows = np.flatnonzero(valid)
+        return pd.DataFrame(
+            {
+                "entry": self.entries[rows],
+                "Manager": [self.player_names[i] for i in rows],
+                "Team": [self.entry_names[i] for i in rows],
+                "Start Rank": self.ranks[rows, from_gw - 1],
+                "End Rank": self.ranks[rows, to_gw - 1],
+                "Rank Gain": gains[rows],
+                "Current Points": self.totals[rows, to_gw - 1],
+            }
+        )
+
+    def best_climbs(self, from_gw: int, to_gw: int, n: int = 10) -> pd.DataFrame:
+        return self.movement_table(from_gw, to_gw).nlargest(n, "Rank Gain", keep="all")
+
+    def worst_climbs(self, from_gw: int, to_gw: int, n: int = 10) -> pd.DataFrame:
+        return self.movement_table(from_gw, to_gw).nsmallest(n, "Rank Gain", keep="all")
+
+
+def trajectory_version(league_id: int) -> Tuple[int, str]:
+    """
+    Cheap change marker for cache keys: row count and latest capture time.
+    """
+    with snapshot_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT COUNT(*) AS n, MAX(captured_at) AS captured_at
+            FROM league_rank_snapshots
+            WHERE league_id = ? AND source = 'cumulative_total_points'
+            """,
+            (league_id,),
+        ).fetchone()
+    return int(row["n"]), row["captured_at"] or ""
+
+
+def load_rank_trajectory(league_id: int) -> RankTrajectory:
+    with snapshot_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT entry, gw, rank, total, player_name, entry_name
+            FROM league_rank_snapshots
+            WHERE league_id = ? AND source = 'cumulative_total_points'
+            ORDER BY entry ASC, gw ASC
+            """,
+            (league_id,),
+        ).fetchall()
+
+    names: Dict[int, Tuple[str, str]] = {}
+    for row in rows:
+        # Latest GW's names win, as managers can rename their team.
+        names[int(row["entry"])] = (row["player_name"], row["entry_name"])
+
+    entries = np.asarray(sorted(names), dtype=np.int64)
+    index = {int(entry): i for i, entry in enumerate(entries)}
+    ranks = np.full((len(entries), SEASON_GWS), MISSING_RANK, dtype=np.int32)
+    totals = np.zeros((len(entries), SEASON_GWS), dtype=np.int32)
+
+    if rows:
+        data: Dict[str, Any] = {
+            key: np.asarray([row[key] for row in rows]) for key in ("entry", "gw", "rank", "total")
+        }
+        in_season = (data["gw"] >= 1) & (data["gw"] <= SEASON_GWS)
+        row_idx = np.fromiter((index[int(e)] for e in data["entry"][in_season]), dtype=np.int64)
+        col_idx = data["gw"][in_season] - 1
+        ranks[row_idx, col_idx] = data["rank"][in_season]
+        totals[row_idx, col_idx] = data["total"][in_season]
+
+    return RankTrajectory(
+        entries=entries,
+        ranks=ranks,
+        totals=totals,
+        player_names=[names[int(entry)][0] for entry in entries],
+        entry_names=[names[int(entry)][1] for entry in entries],
+    )
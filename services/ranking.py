@@ -0,0 +1,92 @@
+# services/ranking.py
+"""
+Vectorized ranking with ties for already-sorted tables.
+
+Every helper takes one or more sort-key columns (NumPy arrays or pandas
+Series, all the same length, rows already in ranking order) and treats two
+adjacent rows as tied when they are equal on every key. group_starts,
+competition_rank and dense_rank also accept 2-D keys, ranking each column
+independently down axis 0 (e.g. entries × gameweeks).
+"""
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def group_starts(*keys) -> np.ndarray:
+    """
+    Boolean mask, True where a row starts a new tie group.
+    """
+    arrays = [np.asarray(key) for key in keys]
+    if not arrays:
+        return np.zeros(0, dtype=bool)
+    starts = np.zeros(arrays[0].shape, dtype=bool)
+    if len(starts) == 0:
+        return starts
+    starts[0] = True
+    for values in arrays:
+        starts[1:] |= values[1:] != values[:-1]
+    return starts
+
+
+def competition_rank(*keys) -> np.ndarray:
+    """
+    "1224" ranks: tied rows share the position of the first row in their group.
+    """
+    starts = group_starts(*keys)
+    row_positions = np.arange(1, len(starts) + 1).reshape((-1,) + (1,) * (starts.ndim - 1))
+    positions = np.where(starts, row_positions, 0)
+    return np.maximum.accumulate(positions, axis=0) if len(positions) else positions
+
+
+def dense_rank(*keys) -> np.ndarray:
+    """
+    "1223" ranks: consecutive tie groups get consecutive ranks.
+    """
+    return np.cumsum(group_starts(*keys), axis=0)
+
+
+@dataclass(frozen=True)
+class TieGroups:
+    """
+    Boundaries of the tie groups of a sorted table: group g covers rows
+    starts[g]:ends[g] and occupies positions starts[g] + 1 .. ends[g].
+    """
+    starts: np.ndarray
+    ends: np.ndarray
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self.ends - self.starts
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.starts + 1
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.starts.tolist(), self.ends.tolist())
+
+    def rows(self, group: int) -> List[int]:
+        return list(range(int(self.starts[group]), int(self.ends[group])))
+
+
+def tie_groups(*keys) -> TieGroups:
+    starts_mask = group_starts(*keys)
+    starts = np.flatnonzero(starts_mask)
+    ends = np.append(starts[1:], len(starts_mask)).astype(starts.dtype)
+    return TieGroups(starts=starts, ends=ends)
+
+
+def insert_position(df: pd.DataFrame, rank_cols: List[str], column: str = "Position") -> pd.DataFrame:
+    """
+    Copy of a sorted frame with a leading competition-rank column, tying rows
+    that are equal on every column in `rank_cols`.
+    """
+    output = df.copy()
+    output.insert(0, column, competition_rank(*(df[col].to_numpy() for col in rank_cols)))
+    return output
@@ -0,0 +1,161 @@
+# services/rate_limit.py
+"""
+Shared client-side rate limiting for the FPL API.
+
+One process-wide FPLRateLimiter combines:
+- a token bucket (FPL_RATE_PER_SEC sustained, FPL_BURST back-to-back) that
+  every request takes a token from, whichever thread sends it;
+- a global pause, set from Retry-After on 429/503, that holds every thread;
+- an AIMD concurrency limit: in-flight requests grow by one per "window" of
+  successes and halve whenever FPL throttles or errors.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Optional
+
+from config import (
+    FPL_BACKOFF_BASE,
+    FPL_BACKOFF_MAX,
+    FPL_BURST,
+    FPL_MAX_CONCURRENCY,
+    FPL_MIN_CONCURRENCY,
+    FPL_RATE_PER_SEC,
+)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause_until(self, resume_at: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, resume_at)
+            self._tokens = 0.0
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    elapsed = now - max(self._updated, self._paused_until)
+                    self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase / multiplicative-decrease cap on in-flight requests.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            # +1 after roughly `limit` consecutive successes.
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_failure(self) -> None:
+        with self._cond:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+
+
+class FPLRateLimiter:
+    def __init__(
+        self,
+        rate: float = FPL_RATE_PER_SEC,
+        burst: int = FPL_BURST,
+        max_concurrency: int = FPL_MAX_CONCURRENCY,
+        min_concurrency: int = FPL_MIN_CONCURRENCY,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, max_concurrency)
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        """
+        Hold a concurrency slot and a rate token for one HTTP request.
+        """
+        with self.concurrency.slot():
+            self.bucket.acquire()
+            yield
+
+    def succeeded(self) -> None:
+        self.concurrency.on_success()
+
+    def failed(self) -> None:
+        self.concurrency.on_failure()
+
+    def throttled(self, delay: float) -> None:
+        """
+        FPL asked us to back off: pause every thread and cut concurrency.
+        """
+        self.concurrency.on_failure()
+        self.bucket.pause_until(time.monotonic() + delay)
+
+    @property
+    def concurrency_limit(self) -> int:
+        return int(self.concurrency.limit)
+
+
+def backoff_delay(attempt: int, base: float = FPL_BACKOFF_BASE, cap: float = FPL_BACKOFF_MAX) -> float:
+    """
+    Exponential backoff with full jitter for retry number `attempt` (0-based).
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either as seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        resume_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if resume_at.tzinfo is None:
+        resume_at = resume_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (resume_at - datetime.now(timezone.utc)).total_seconds())
+
+
+limiter = FPLRateLimiter()
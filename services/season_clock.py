@@ -0,0 +1,24 @@
+# services/season_clock.py
+"""
+Compact season timeline taken from bootstrap-static's `events`.
+
+bootstrap-static is several megabytes (every player and team), while the
+pages only need each gameweek's deadline and status. season_clock() keeps
+just that timeline, shared by every session in the process, so a page rerun
+neither copies nor parses the full payload. The timeline types live in
+services/gameweek_events.py.
+"""
+import streamlit as st
+
+from services import http_cache
+from services.fpl_service import safe_request
+from services.gameweek_events import SeasonClock, build_season_clock
+
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def season_clock() -> SeasonClock:
+    """
+    One immutable timeline per process, refreshed every 5 minutes like
+    fetch_bootstrap_static.
+    """
+    return build_season_clock(safe_request(http_cache.BOOTSTRAP_URL))
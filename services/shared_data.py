@@ -0,0 +1,149 @@
+# services/shared_data.py
+"""
+Immutable, process-wide league data for the pages.
+
+st.cache_data pickles a function's result and hands every caller a fresh
+unpickled copy, which for full standings and every manager's history means
+megabytes copied per call per session. The functions here use
+st.cache_resource instead: one object per explicit key, shared by every
+session, and made read-only (NumPy arrays with writeable=False, records as
+MappingProxyType) so no caller can change what another one sees.
+
+Keys are cheap tuples: (league_id, data_version()). data_version() moves on
+when a new GW finishes and, while the season is running, every CACHE_TTL
+seconds; once GW38 is finished it never changes again.
+
+Managers whose history could not be fetched are listed in `failed`, never
+scored from an empty payload. current_histories() retries just those every
+FPL_NEGATIVE_TTL seconds on top of the shared object, so one failure does
+not stick for a whole CACHE_TTL and a retry does not rebuild everything.
+"""
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+import numpy as np
+import streamlit as st
+
+from config import FPL_NEGATIVE_TTL
+from services.fpl_service import CACHE_TTL, fetch_all_league_standings, fetch_entry_history_many
+from services.season_clock import season_clock
+
+DataVersion = Tuple[int, int]
+SHARED_MAX_ENTRIES = 8
+
+
+def retry_bucket() -> int:
+    """
+    Moves on every FPL_NEGATIVE_TTL seconds: the key under which failed
+    cells are retried.
+    """
+    return int(time.time() // FPL_NEGATIVE_TTL)
+
+
+def data_version() -> DataVersion:
+    clock = season_clock()
+    refresh_bucket = 0 if clock.season_finished else int(time.time() // CACHE_TTL)
+    return clock.latest_finished_gw, refresh_bucket
+
+
+def freeze_array(values: np.ndarray) -> np.ndarray:
+    values.flags.writeable = False
+    return values
+
+
+def freeze_records(rows: Iterable[Mapping[str, Any]]) -> Tuple[Mapping[str, Any], ...]:
+    return tuple(MappingProxyType(dict(row)) for row in rows)
+
+
+@dataclass(frozen=True)
+class LeagueTable:
+    """
+    Current classic-league standings. `rows` keeps the API records (read-only)
+    in standings order for code that works on dicts; the arrays hold the same
+    rows' numeric columns.
+    """
+    rows: Tuple[Mapping[str, Any], ...]
+    entries: np.ndarray
+    ranks: np.ndarray
+    totals: np.ndarray
+    index: Mapping[int, int]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, entry_id: int) -> Mapping[str, Any]:
+        return self.rows[self.index[int(entry_id)]]
+
+
+@dataclass(frozen=True)
+class LeagueHistories:
+    """
+    Every manager's entry-history payload by entry id. Payloads are shared
+    between sessions: treat them as read-only.
+    """
+    histories: Mapping[int, Dict[str, Any]]
+    failed: Tuple[int, ...]
+
+
+def build_league_table(standings: Iterable[Mapping[str, Any]]) -> LeagueTable:
+    rows = freeze_records(standings)
+    entries = np.asarray([int(row["entry"]) for row in rows], dtype=np.int64)
+    return LeagueTable(
+        rows=rows,
+        entries=freeze_array(entries),
+        ranks=freeze_array(np.asarray([int(row.get("rank") or 0) for row in rows], dtype=np.int64)),
+        totals=freeze_array(np.asarray([int(row.get("total") or 0) for row in rows], dtype=np.int64)),
+        index=MappingProxyType({int(entry): i for i, entry in enumerate(entries)}),
+    )
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def league_table(league_id: int, version: DataVersion) -> LeagueTable:
+    return build_league_table(fetch_all_league_standings(league_id))
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def league_histories(league_id: int, version: DataVersion) -> LeagueHistories:
+    table = league_table(league_id, version)
+    batch = fetch_entry_history_many(table.entries.tolist())
+    return LeagueHistories(histories=MappingProxyType(batch.results), failed=tuple(batch.failed))
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=SHARED_MAX_ENTRIES, show_spinner=False)
+def _repaired_histories(league_id: int, version: DataVersion, bucket: int) -> LeagueHistories:
+    base = league_histories(league_id, version)
+    batch = fetch_entry_history_many(base.failed)
+    histories = dict(base.histories)
+    histories.update((entry, batch.results[entry]) for entry in base.failed if entry not in batch.failed)
+    return LeagueHistories(histories=MappingProxyType(histories), failed=tuple(batch.failed))
+
+
+def current_histories(league_id: int, version: DataVersion) -> LeagueHistories:
+    """
+    league_histories with its failed entries refetched (only those) once per
+    retry_bucket(); still-missing entries stay in `failed`.
+    """
+    base = league_histories(league_id, version)
+    if not base.failed:
+        return base
+    return _repaired_histories(league_id, version, retry_bucket())
+
+
+def missing_managers(league_id: int, entry_ids: Iterable[int]) -> List[str]:
+    """
+    Display names for entries reported as missing data, for page warnings.
+    """
+    table = league_table(league_id, data_version())
+    return [
+        str(table.row(entry).get("player_name") or entry) if int(entry) in table.index else str(entry)
+        for entry in entry_ids
+    ]
+
+
+def league_standings(league_id: int) -> Tuple[Mapping[str, Any], ...]:
+    """
+    Current standings records, shared across sessions.
+    """
+    return league_table(league_id, data_version()).rows
@@ -0,0 +1,205 @@
+# services/slammers.py
+"""
+Gameweek Slammer podiums for every gameweek in one vectorized pass over the
+net points matrix.
+
+Managers are ordered by GW net points, then current total points, then
+standings order; tie groups are formed on GW net points only. Medals go to
+the tie groups that start at positions 1, 2 and 3:
+
+- a single leader is the Winner (🥇);
+- two or more tied leaders are Joint Winners (🥇) and share the pots of
+  every place they cover, so 3+ tied leaders leave no 🥈 or 🥉;
+- the group starting at 2nd is Second (🥈) and shares the second pot; a
+  tie there means no group starts at 3rd, so bronze is skipped;
+- the group starting at 3rd is Third (🥉) and shares the third pot.
+
+For the GW that has just finished (still FPL's current GW) the page reuses
+every stored history that already agrees with the standings and refetches
+only the rest (gameweek_matrix) instead of revalidating every history.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.points_matrix import (
+    SEASON_GWS,
+    SeasonPointsMatrix,
+    season_points_matrix,
+    synced_points_matrix,
+)
+from services.ranking import group_starts
+from services.season_clock import season_clock
+from services.shared_data import data_version
+
+PODIUM_PLACES = 3
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+
+@dataclass(frozen=True)
+class SlammerPodiums:
+    """
+    One row per medal winner, sorted by GW then podium order. `rows` index
+    the standings passed to gameweek_podiums.
+    """
+    rows: np.ndarray
+    gws: np.ndarray
+    points: np.ndarray
+    positions: np.ndarray
+    group_sizes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def for_gw(self, gw: int) -> "SlammerPodiums":
+        mask = self.gws == gw
+        return SlammerPodiums(
+            rows=self.rows[mask],
+            gws=self.gws[mask],
+            points=self.points[mask],
+            positions=self.positions[mask],
+            group_sizes=self.group_sizes[mask],
+        )
+
+
+def _unscored(matrix: SeasonPointsMatrix) -> np.ndarray:
+    """
+    entries × GW: GWs after the last one in a manager's history (a stale or
+    short history), for managers whose history was fetched. Earlier gaps are
+    GWs before the manager joined and are simply not played.
+    """
+    has_row = matrix.played.any(axis=1)
+    last_gw = np.where(has_row, SEASON_GWS - np.argmax(matrix.played[:, ::-1], axis=1), 0)
+    failed = np.isin(matrix.entries, np.asarray(matrix.failed, dtype=np.int64))
+    return (np.arange(1, SEASON_GWS + 1)[None, :] > last_gw[:, None]) & ~failed[:, None]
+
+
+def unscored_entries(matrix: SeasonPointsMatrix, gw: int) -> List[int]:
+    """
+    Managers with a history that stops before `gw`; no medals are awarded
+    for `gw` until they are refetched.
+    """
+    return [int(entry) for entry in matrix.entries[_unscored(matrix)[:, gw - 1]]]
+
+
+def _standings_arrays(
+    standings: List[Dict[str, Any]], matrix: SeasonPointsMatrix
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The net points and played matrices re-ordered to match `standings`,
+    current totals, which rows have no points data (matrix.failed) and which
+    cells are unscored (_unscored).
+    """
+    rows = matrix.rows(row["entry"] for row in standings)
+    net = matrix.net[rows]
+    played = matrix.played[rows]
+    totals = np.asarray([int(row.get("total", 0)) for row in standings], dtype=np.int64)
+    missing = np.isin(matrix.entries[rows], np.asarray(matrix.failed, dtype=np.int64))
+    return net, played, totals, missing, _unscored(matrix)[rows]
+
+
+def gameweek_podiums(
+    standings: List[Dict[str, Any]],
+    matrix: SeasonPointsMatrix,
+    gws: Sequence[int] | None = None,
+) -> SlammerPodiums:
+    """
+    Medal winners for `gws` (default: every GW). A GW where any manager is
+    unscored (_unscored) gets no podium at all.
+    """
+    net, played, totals, missing, unscored = _standings_arrays(standings, matrix)
+    gws = np.asarray(list(gws) if gws is not None else range(1, SEASON_GWS + 1), dtype=np.int64)
+    empty = np.zeros(0, dtype=np.int64)
+    if len(standings) == 0 or len(gws) == 0:
+        return SlammerPodiums(empty, empty, empty, empty, empty)
+
+    points = net[:, gws - 1]
+    # Only managers scoring at least the 3rd-best score of a GW can medal;
+    # managers without points data for it are left out rather than scored 0.
+    scored = played[:, gws - 1] & ~missing[:, None]
+    complete = ~unscored[:, gws - 1].any(axis=0)
+    kth = min(PODIUM_PLACES, len(points)) - 1
+    ranked = np.where(scored, points, points.min(initial=0) - 1)
+    cutoff = -np.partition(-ranked, kth, axis=0)[kth]
+    rows, cols = np.nonzero((points >= cutoff) & scored & complete[None, :])
+
+    cand_points = points[rows, cols]
+    order = np.lexsort((rows, -totals[rows], -cand_points, cols))
+    rows, cols, cand_points = rows[order], cols[order], cand_points[order]
+
+    index = np.arange(len(rows))
+    gw_first = np.maximum.accumulate(np.where(group_starts(cols), index, 0))
+    starts = group_starts(cols, cand_points)
+    group_first = np.maximum.accumulate(np.where(starts, index, 0))
+    positions = group_first - gw_first + 1
+
+    group_ids = np.cumsum(starts) - 1
+    group_sizes = np.bincount(group_ids)[group_ids]
+
+    podium = positions <= PODIUM_PLACES
+    return SlammerPodiums(
+        rows=rows[podium],
+        gws=gws[cols[podium]],
+        points=cand_points[podium],
+        positions=positions[podium],
+        group_sizes=group_sizes[podium],
+    )
+
+
+def place_label(position: int, group_size: int) -> str:
+    if position == 1:
+        return "Winner" if group_size == 1 else "Joint Winner"
+    return "Second" if position == 2 else "Third"
+
+
+def award_name(position: int, gw: int) -> str:
+    return {1: "Gameweek Slammer", 2: "Second Slammer", 3: "Third Slammer"}[position] + f" GW{gw}"
+
+
+def share(position: int, group_size: int, pots: Sequence[float]) -> float:
+    """
+    Each tied manager's share. Tied leaders pool the pots of every place they
+    cover; a tie at 2nd or 3rd splits only that place's pot.
+    """
+    if position == 1:
+        return sum(pots[:min(group_size, PODIUM_PLACES)]) / group_size
+    return pots[position - 1] / group_size
+
+
+def gameweek_table(standings: List[Dict[str, Any]], matrix: SeasonPointsMatrix, gw: int) -> pd.DataFrame:
+    """
+    Every manager for one GW in Slammer order, with a Medal column. Managers
+    without points data for the GW come last; failed or unscored ones are
+    marked ⚠️ in the Medal column.
+    """
+    net, played, totals, missing, unscored = _standings_arrays(standings, matrix)
+    flagged = missing | unscored[:, gw - 1]
+    order = np.lexsort((-totals, -net[:, gw - 1], missing | ~played[:, gw - 1]))
+    medals = np.where(flagged, "⚠️", "").astype(object)
+    podium = gameweek_podiums(standings, matrix, [gw])
+    medals[podium.rows] = [MEDALS[int(position)] for position in podium.positions]
+
+    return pd.DataFrame(
+        {
+            "Medal": medals[order],
+            "entry": [int(standings[i]["entry"]) for i in order],
+            "Manager": [standings[i].get("player_name", "") for i in order],
+            "Team": [standings[i].get("entry_name", "") for i in order],
+            "GWPoints": net[order, gw - 1],
+            "TotalPoints": totals[order],
+        }
+    )
+
+
+def gameweek_matrix(league_id: int, gw: int) -> SeasonPointsMatrix:
+    """
+    Points for ranking one finished GW. While it is still FPL's current GW
+    only the histories that disagree with the standings are fetched; older
+    GWs use the shared season matrix.
+    """
+    clock = season_clock()
+    if gw == clock.latest_finished_gw == clock.current_gw:
+        return synced_points_matrix(league_id, gw, data_version())
+    return season_points_matrix(league_id)
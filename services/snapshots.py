@@ -1,53 +1,126 @@
 import sqlite3
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Any, Dict, List
-
-from config import SNAPSHOT_DB_PATH
-from services.fpl_service import fetch_all_league_standings, fetch_entry_history
+from typing import Any, Dict, List, Tuple
 
+import numpy as np
 
-def _connect(db_path: Path = SNAPSHOT_DB_PATH) -> sqlite3.Connection:
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+from config import SNAPSHOT_DB_PATH
+from services import db
+from services.points_matrix import SEASON_GWS, SeasonPointsMatrix, season_points_matrix
+from services.ranking import competition_rank
+from services.season_clock import season_clock
+from services.shared_data import league_standings
+from services.single_flight import SingleFlight
 
 
-def init_snapshot_db() -> None:
-    with _connect() as conn:
+def _create_rank_snapshots(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS league_rank_snapshots (
+            league_id INTEGER NOT NULL,
+            gw INTEGER NOT NULL,
+            entry INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            entry_name TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            captured_at TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT 'cumulative_total_points',
+            PRIMARY KEY (league_id, gw, entry)
+        )
+        """
+    )
+    columns = {
+        row["name"]
+        for row in conn.execute("PRAGMA table_info(league_rank_snapshots)").fetchall()
+    }
+    if "source" not in columns:
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS league_rank_snapshots (
-                league_id INTEGER NOT NULL,
-                gw INTEGER NOT NULL,
-                entry INTEGER NOT NULL,
-                player_name TEXT NOT NULL,
-                entry_name TEXT NOT NULL,
-                rank INTEGER NOT NULL,
-                total INTEGER NOT NULL,
-                captured_at TEXT NOT NULL,
-                source TEXT NOT NULL DEFAULT 'cumulative_total_points',
-                PRIMARY KEY (league_id, gw, entry)
-            )
+            ALTER TABLE league_rank_snapshots
+            ADD COLUMN source TEXT
             """
         )
-        columns = {
-            row["name"]
-            for row in conn.execute("PRAGMA table_info(league_rank_snapshots)").fetchall()
-        }
-        if "source" not in columns:
-            conn.execute(
-                """
-                ALTER TABLE league_rank_snapshots
-                ADD COLUMN source TEXT
-                """
-            )
+
+
+def _create_lps_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lps_gameweeks (
+            league_id INTEGER NOT NULL,
+            gw INTEGER NOT NULL,
+            survivors INTEGER NOT NULL,
+            computed_at TEXT NOT NULL,
+            PRIMARY KEY (league_id, gw)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lps_eliminations (
+            league_id INTEGER NOT NULL,
+            gw INTEGER NOT NULL,
+            elim_order INTEGER NOT NULL,
+            entry INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            entry_name TEXT NOT NULL,
+            raw_points INTEGER NOT NULL,
+            minus_points INTEGER NOT NULL,
+            net_points INTEGER NOT NULL,
+            overall_points INTEGER NOT NULL,
+            overall_rank INTEGER NOT NULL,
+            PRIMARY KEY (league_id, gw, entry)
+        )
+        """
+    )
+
+
+# Applied in order, once per process; the index is stored in PRAGMA user_version.
+# Only ever append to this list.
+SNAPSHOT_MIGRATIONS = [
+    _create_rank_snapshots,
+    _create_lps_tables,
+    # Covering indexes: a GW's table in rank order, and one manager's trajectory.
+    """
+    CREATE INDEX IF NOT EXISTS idx_rank_snapshots_gw_rank
+    ON league_rank_snapshots (league_id, gw, rank, entry, total)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_rank_snapshots_entry_gw
+    ON league_rank_snapshots (league_id, entry, gw, rank, total)
+    """,
+    # Each manager's 15 picks for a GW, locked at the deadline (services/live_scoring.py).
+    """
+    CREATE TABLE IF NOT EXISTS gw_lineups (
+        entry INTEGER NOT NULL,
+        gw INTEGER NOT NULL,
+        picks TEXT NOT NULL,
+        active_chip TEXT,
+        transfer_cost INTEGER NOT NULL,
+        captured_at TEXT NOT NULL,
+        PRIMARY KEY (gw, entry)
+    )
+    """,
+]
+
+
+# Rank snapshot rebuilds in progress, keyed by what they rebuild.
+snapshot_rebuilds = SingleFlight()
+
+
+def snapshot_connection() -> sqlite3.Connection:
+    """
+    This thread's connection to the snapshot database (WAL, schema migrated).
+    """
+    return db.connect(SNAPSHOT_DB_PATH, SNAPSHOT_MIGRATIONS)
+
+
+def init_snapshot_db() -> None:
+    snapshot_connection()
 
 
 def load_league_rank_snapshot(league_id: int, gw: int) -> List[Dict[str, Any]]:
-    init_snapshot_db()
-    with _connect() as conn:
+    with snapshot_connection() as conn:
         rows = conn.execute(
             """
             SELECT entry, player_name, entry_name, rank, total, captured_at
@@ -62,7 +135,13 @@ def load_league_rank_snapshot(league_id: int, gw: int) -> List[Dict[str, Any]]:
 
 
 def save_league_rank_snapshot(league_id: int, gw: int, standings: List[Dict[str, Any]]) -> None:
-    init_snapshot_db()
+    save_league_rank_snapshots(league_id, {gw: standings})
+
+
+def save_league_rank_snapshots(league_id: int, snapshots: Dict[int, List[Dict[str, Any]]]) -> None:
+    """
+    Write several GW snapshots in a single transaction.
+    """
     captured_at = datetime.now(timezone.utc).isoformat()
     rows = [
         (
@@ -76,6 +155,7 @@ def save_league_rank_snapshot(league_id: int, gw: int, standings: List[Dict[str,
             captured_at,
             "cumulative_total_points",
         )
+        for gw, standings in snapshots.items()
         for row in standings
         if row.get("entry") is not None and row.get("rank") is not None
     ]
@@ -83,7 +163,7 @@ def save_league_rank_snapshot(league_id: int, gw: int, standings: List[Dict[str,
     if not rows:
         return
 
-    with _connect() as conn:
+    with snapshot_connection() as conn:
         conn.executemany(
             """
             INSERT OR REPLACE INTO league_rank_snapshots
@@ -94,56 +174,116 @@ def save_league_rank_snapshot(league_id: int, gw: int, standings: List[Dict[str,
         )
 
 
+def rank_gameweeks(
+    standings: List[Dict[str, Any]], matrix: SeasonPointsMatrix, gws: List[int]
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Build the Big Whammy table as it stood after each of `gws` using each
+    manager's cumulative official FPL total_points after that gameweek.
+    Every GW is ranked at once: one lexsort down the entries axis of the
+    entries × GW totals, then competition ranks per column.
+    """
+    gws = [gw for gw in gws if 1 <= gw <= SEASON_GWS]
+    if not gws or not len(matrix):
+        return {gw: [] for gw in gws}
+
+    by_entry = {int(row["entry"]): row for row in standings}
+    cols = np.asarray(gws) - 1
+    totals = matrix.total[:, cols]
+    played = matrix.played[:, cols]
+    # Use current official order only as a stable deterministic fallback
+    # when cumulative points are tied.
+    current_rank = np.asarray(
+        [int(by_entry.get(int(entry), {}).get("rank", 10**9)) for entry in matrix.entries]
+    )[:, None]
+    entries = matrix.entries[:, None]
+
+    # Managers without a history row for a GW sort to the bottom and are dropped.
+    order = np.lexsort(
+        (
+            np.broadcast_to(entries, totals.shape),
+            np.broadcast_to(current_rank, totals.shape),
+            -totals,
+            ~played,
+        ),
+        axis=0,
+    )
+    sorted_totals = np.take_along_axis(totals, order, axis=0)
+    sorted_played = np.take_along_axis(played, order, axis=0)
+    ranks = competition_rank(sorted_totals)
+
+    snapshots: Dict[int, List[Dict[str, Any]]] = {}
+    for col, gw in enumerate(gws):
+        rows = []
+        for position in np.flatnonzero(sorted_played[:, col]):
+            entry = int(matrix.entries[order[position, col]])
+            standing = by_entry.get(entry, {})
+            rows.append(
+                {
+                    "entry": entry,
+                    "player_name": standing.get("player_name", ""),
+                    "entry_name": standing.get("entry_name", ""),
+                    "rank": int(ranks[position, col]),
+                    "total": int(sorted_totals[position, col]),
+                }
+            )
+        snapshots[gw] = rows
+    return snapshots
+
+
+def _league_points_matrix(league_id: int) -> Tuple[List[Dict[str, Any]], SeasonPointsMatrix]:
+    return list(league_standings(league_id)), season_points_matrix(league_id)
+
+
 def build_cumulative_league_rank_snapshot(league_id: int, gw: int) -> List[Dict[str, Any]]:
     """
     Build the Big Whammy table as it stood after `gw` using each manager's
     cumulative official FPL total_points after that gameweek.
     """
-    standings = fetch_all_league_standings(league_id)
-    rows: List[Dict[str, Any]] = []
-
-    for current_row in standings:
-        entry = int(current_row["entry"])
-        history = fetch_entry_history(entry)
-        gw_rows = history.get("current", []) or []
-        gw_row = next((row for row in gw_rows if int(row.get("event", 0)) == gw), None)
-
-        if not gw_row:
-            continue
-
-        rows.append(
-            {
-                "entry": entry,
-                "player_name": current_row.get("player_name", ""),
-                "entry_name": current_row.get("entry_name", ""),
-                "total": int(gw_row.get("total_points", 0)),
-                # Use current official order only as a stable deterministic fallback
-                # when cumulative points are tied.
-                "current_rank": int(current_row.get("rank", 10**9)),
-            }
-        )
+    standings, matrix = _league_points_matrix(league_id)
+    if matrix.failed:
+        print(f"⚠️ GW{gw} rank snapshot not built: no history for {len(matrix.failed)} manager(s)")
+        return []
+    return rank_gameweeks(standings, matrix, [gw])[gw]
 
-    rows.sort(key=lambda row: (-row["total"], row["current_rank"], row["entry"]))
-
-    ranked_rows = []
-    previous_total = None
-    previous_rank = 0
-    for index, row in enumerate(rows, start=1):
-        if previous_total is None or row["total"] != previous_total:
-            previous_rank = index
-            previous_total = row["total"]
-
-        ranked_rows.append(
-            {
-                "entry": row["entry"],
-                "player_name": row["player_name"],
-                "entry_name": row["entry_name"],
-                "rank": previous_rank,
-                "total": row["total"],
-            }
-        )
 
-    return ranked_rows
+def backfill_league_rank_snapshots(league_id: int, gws: List[int] | None = None) -> List[int]:
+    """
+    Capture rank snapshots for many final GWs (default: all of them) from a
+    single history fetch per manager, written in one transaction. Returns the
+    GWs that were saved.
+    """
+    key = ("backfill", league_id, tuple(gws) if gws is not None else None)
+    return snapshot_rebuilds.do(key, lambda: _backfill(league_id, gws))
+
+
+def _backfill(league_id: int, gws: List[int] | None) -> List[int]:
+    standings, matrix = _league_points_matrix(league_id)
+    return save_rank_snapshots_from_matrix(league_id, standings, matrix, gws)
+
+
+def save_rank_snapshots_from_matrix(
+    league_id: int,
+    standings: List[Dict[str, Any]],
+    matrix: SeasonPointsMatrix,
+    gws: List[int] | None = None,
+) -> List[int]:
+    """
+    Rank and save snapshots from data the caller already holds, for final
+    GWs only (season_clock().is_final; default: every final GW), since a
+    saved snapshot is not rebuilt. Nothing is saved while some manager's
+    history is missing (matrix.failed).
+    """
+    if matrix.failed:
+        print(f"⚠️ Rank snapshots not saved: no history for {len(matrix.failed)} manager(s)")
+        return []
+    clock = season_clock()
+    if gws is None:
+        gws = range(1, SEASON_GWS + 1)
+    gws = [gw for gw in gws if clock.is_final(gw) and matrix.played[:, gw - 1].any()]
+    snapshots = {gw: rows for gw, rows in rank_gameweeks(standings, matrix, gws).items() if rows}
+    save_league_rank_snapshots(league_id, snapshots)
+    return sorted(snapshots)
 
 
 def get_or_capture_league_rank_snapshot(
@@ -154,9 +294,15 @@ def get_or_capture_league_rank_snapshot(
         if cached:
             return cached
 
+    # Concurrent captures of the same GW (e.g. simultaneous refresh clicks)
+    # share one rebuild.
+    return snapshot_rebuilds.do(("capture", league_id, gw), lambda: _capture(league_id, gw))
+
+
+def _capture(league_id: int, gw: int) -> List[Dict[str, Any]]:
     standings = build_cumulative_league_rank_snapshot(league_id, gw)
+    if not season_clock().is_final(gw):
+        return standings  # provisional: shown, never stored
     if standings:
         save_league_rank_snapshot(league_id, gw, standings)
-        return load_league_rank_snapshot(league_id, gw)
-
     return load_league_rank_snapshot(league_id, gw)
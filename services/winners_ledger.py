@@ -1,29 +1,41 @@
 import csv
 import io
 import json
-from collections import defaultdict
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Tuple, Union
 
 import pandas as pd
 
-from config import BASE_DIR, IRON_MAN_BASE_GW, LEAGUE_ID
+from config import BASE_DIR, IRON_MAN_BASE_GW, LEAGUE_ID, LEDGER_BACKEND
+from services import ledger_store
 from services.awards import (
-    everest_table,
-    knockout_cup_rows,
-    late_surge_table,
-    wildcard_wizard_table,
+    build_everest_rows,
+    build_knockout_cup_rows,
+    build_late_surge_rows,
+    build_wildcard_wizard_rows,
+    everest_frame,
+    fetch_knockout_matches,
+    late_surge_frame,
+    wildcard_wizard_frame,
 )
-from services.fpl_service import (
-    compute_net_points,
-    fetch_all_league_standings,
-    fetch_entry_event_picks,
-)
-from services.lps import coin_toss_seeded, elimination_schedule
-from services.snapshots import get_or_capture_league_rank_snapshot
-
+from services.fpl_service import BatchResult, fetch_all_league_standings, fetch_entry_history_many
+from services.lps import lps_eliminations, lps_survivors, update_lps_log
+from services.pipeline import Stage, content_hash, run_stages
+from services.points_matrix import SEASON_GWS, SeasonPointsMatrix, build_points_matrix
+from services.ranking import insert_position, tie_groups
+from services.rank_trajectory import load_rank_trajectory
+from services.season_clock import season_clock
+from services.slammers import award_name, gameweek_podiums, place_label, share, unscored_entries
+from services.snapshots import save_rank_snapshots_from_matrix
+
+SEASON = "2025-26"
 LEDGER_PATH = BASE_DIR / "data" / "winners_ledger_2025_26.json"
+LEDGER_WORKERS = 4
 
 PAYOUTS = {
     "gw_slammer": 1800,
@@ -80,143 +92,38 @@ def _split_pot(total: int, winners: List[Dict[str, Any]]) -> float:
     return total / len(winners) if winners else 0
 
 
-def _gw_points_rows(league_id: int, gw: int) -> pd.DataFrame:
-    standings = fetch_all_league_standings(league_id)
-    rows = []
-    for manager in standings:
-        entry_id = int(manager["entry"])
-        picks = fetch_entry_event_picks(entry_id, gw)
-        points = compute_net_points(picks)
-        rows.append(
-            {
-                "entry": entry_id,
-                "Manager": manager.get("player_name", ""),
-                "Team": manager.get("entry_name", ""),
-                "GWPoints": int(points["net_points"]),
-                "TotalPoints": int(manager.get("total", 0)),
-            }
-        )
-
-    return pd.DataFrame(rows).sort_values(
-        by=["GWPoints", "TotalPoints"],
-        ascending=[False, False],
-    ).reset_index(drop=True)
-
-
-def _score_groups(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    groups = []
-    i = 0
-    while i < len(df):
-        value = df.loc[i, "GWPoints"]
-        j = i
-        indices = []
-        while j < len(df) and df.loc[j, "GWPoints"] == value:
-            indices.append(j)
-            j += 1
-        groups.append({"value": value, "indices": indices, "start_pos": i + 1, "size": len(indices)})
-        i = j
-    return groups
-
+def _gameweek_slammer_entries(standings: List[Dict[str, Any]], points_matrix: SeasonPointsMatrix) -> List[Dict[str, Any]]:
+    for gw in range(1, SEASON_GWS + 1):
+        stale = unscored_entries(points_matrix, gw) if points_matrix.played[:, gw - 1].any() else []
+        if stale:
+            raise RuntimeError(f"GW{gw} history missing for {len(stale)} manager(s) {stale}; not paying its Slammers")
+    podiums = gameweek_podiums(standings, points_matrix)
+    pots = (PAYOUTS["gw_slammer"], PAYOUTS["gw_second"], PAYOUTS["gw_third"])
 
-def _gameweek_slammer_entries(league_id: int) -> List[Dict[str, Any]]:
     entries = []
-
-    for gw in range(1, 39):
-        df = _gw_points_rows(league_id, gw)
-        groups = _score_groups(df)
-        if not groups:
-            continue
-
-        first = groups[0]
-        if first["size"] == 1:
-            row = df.loc[first["indices"][0]]
-            entries.append(
-                _entry(
-                    row["Manager"],
-                    row["Team"],
-                    f"Gameweek Slammer GW{gw}",
-                    f"{row['GWPoints']} net points",
-                    "Winner",
-                    PAYOUTS["gw_slammer"],
-                    "Gameweek Slammers",
-                )
-            )
-        elif first["size"] == 2:
-            winners = [df.loc[index] for index in first["indices"]]
-            payout = _split_pot(PAYOUTS["gw_slammer"] + PAYOUTS["gw_second"], winners)
-            for row in winners:
-                entries.append(
-                    _entry(
-                        row["Manager"],
-                        row["Team"],
-                        f"Gameweek Slammer GW{gw}",
-                        f"{row['GWPoints']} net points",
-                        "Joint Winner",
-                        payout,
-                        "Gameweek Slammers",
-                    )
-                )
-        else:
-            winners = [df.loc[index] for index in first["indices"]]
-            payout = _split_pot(
-                PAYOUTS["gw_slammer"] + PAYOUTS["gw_second"] + PAYOUTS["gw_third"],
-                winners,
+    for row, gw, points, position, size in zip(
+        podiums.rows.tolist(),
+        podiums.gws.tolist(),
+        podiums.points.tolist(),
+        podiums.positions.tolist(),
+        podiums.group_sizes.tolist(),
+    ):
+        manager = standings[row]
+        entries.append(
+            _entry(
+                manager.get("player_name", ""),
+                manager.get("entry_name", ""),
+                award_name(position, gw),
+                f"{points} net points",
+                place_label(position, size),
+                share(position, size, pots),
+                "Gameweek Slammers",
             )
-            for row in winners:
-                entries.append(
-                    _entry(
-                        row["Manager"],
-                        row["Team"],
-                        f"Gameweek Slammer GW{gw}",
-                        f"{row['GWPoints']} net points",
-                        "Joint Winner",
-                        payout,
-                        "Gameweek Slammers",
-                    )
-                )
-            continue
-
-        for group in groups[1:]:
-            rows = [df.loc[index] for index in group["indices"]]
-            if group["start_pos"] == 2:
-                payout = _split_pot(PAYOUTS["gw_second"], rows)
-                for row in rows:
-                    entries.append(
-                        _entry(
-                            row["Manager"],
-                            row["Team"],
-                            f"Second Slammer GW{gw}",
-                            f"{row['GWPoints']} net points",
-                            "Second",
-                            payout,
-                            "Gameweek Slammers",
-                        )
-                    )
-                if group["size"] > 1:
-                    break
-                continue
-
-            if group["start_pos"] == 3:
-                payout = _split_pot(PAYOUTS["gw_third"], rows)
-                for row in rows:
-                    entries.append(
-                        _entry(
-                            row["Manager"],
-                            row["Team"],
-                            f"Third Slammer GW{gw}",
-                            f"{row['GWPoints']} net points",
-                            "Third",
-                            payout,
-                            "Gameweek Slammers",
-                        )
-                    )
-                break
-
+        )
     return entries
 
 
-def _overall_entries(league_id: int) -> List[Dict[str, Any]]:
-    standings = fetch_all_league_standings(league_id)
+def _overall_entries(standings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     position_awards = {
         1: ("Manager of the Season", "Winner", PAYOUTS["manager_of_season"]),
         2: ("2nd Place", "Second", PAYOUTS["second_place"]),
@@ -239,37 +146,27 @@ def _overall_entries(league_id: int) -> List[Dict[str, Any]]:
         ]
     ).sort_values(["Total", "Official Rank", "Manager"], ascending=[False, True, True]).reset_index(drop=True)
 
-    groups = []
-    i = 0
-    while i < len(df):
-        total = df.loc[i, "Total"]
-        j = i
-        indices = []
-        while j < len(df) and df.loc[j, "Total"] == total:
-            indices.append(j)
-            j += 1
-        groups.append({"start": i + 1, "end": j, "indices": indices})
-        i = j
-
-    for group in groups:
-        occupied_positions = range(group["start"], group["end"] + 1)
+    records = df.to_dict("records")
+    for start, end in tie_groups(df["Total"].to_numpy()):
+        if start >= max(position_awards):
+            break
+        occupied_positions = range(start + 1, end + 1)
         paid_positions = [pos for pos in occupied_positions if pos in position_awards]
         if not paid_positions:
             continue
-        payout = sum(position_awards[pos][2] for pos in paid_positions) / len(group["indices"])
+        payout = sum(position_awards[pos][2] for pos in paid_positions) / (end - start)
         first_position = paid_positions[0]
         award, position, _ = position_awards[first_position]
-        if len(group["indices"]) > 1:
+        if end - start > 1:
             position = f"Joint {position}"
 
-        for index in group["indices"]:
-            row = df.loc[index]
+        for row in records[start:end]:
             entries.append(
                 _entry(
                     row["Manager"],
                     row["Team"],
                     award,
-                    f"Final Big Whammy rank {group['start']} with {row['Total']} points",
+                    f"Final Big Whammy rank {start + 1} with {row['Total']} points",
                     position,
                     payout,
                     "Overall Standings",
@@ -307,7 +204,7 @@ def _ranked_award_entries(
             continue
         payout = _split_pot(PAYOUTS[payout_key], winners.to_dict("records"))
         position_label = "Winner" if position == 1 else "Runner-up"
-        for _, row in winners.iterrows():
+        for row in winners.to_dict("records"):
             entries.append(
                 _entry(
                     row["Manager"],
@@ -322,41 +219,28 @@ def _ranked_award_entries(
     return entries
 
 
-def _iron_man_entries(league_id: int) -> List[Dict[str, Any]]:
-    base_snapshot = get_or_capture_league_rank_snapshot(league_id, IRON_MAN_BASE_GW, force_refresh=True)
-    current_snapshot = get_or_capture_league_rank_snapshot(league_id, 38, force_refresh=True)
-
-    base_by_entry = {int(row["entry"]): row for row in base_snapshot}
-    rows = []
-    for current_row in current_snapshot:
-        entry = int(current_row["entry"])
-        base_row = base_by_entry.get(entry)
-        if not base_row:
-            continue
-        start_rank = int(base_row["rank"])
-        current_rank = int(current_row["rank"])
-        rows.append(
-            {
-                "Manager": current_row.get("player_name", ""),
-                "Team": current_row.get("entry_name", ""),
-                "Rank Gain": start_rank - current_rank,
-                "Rank After GW19": start_rank,
-                "Current Rank": current_rank,
-            }
-        )
+def _iron_man_entries(
+    league_id: int, standings: List[Dict[str, Any]], points_matrix: SeasonPointsMatrix, final_gws: List[int]
+) -> List[Dict[str, Any]]:
+    """
+    Paid from the GW19 and GW38 rank snapshots, rebuilt here from the
+    matrix; nothing is paid before GW38 is final. Raises if they cannot be
+    saved rather than reading whatever snapshots are stored.
+    """
+    if 38 not in final_gws:
+        print("⚠️ Iron Man is paid once GW38 is final")
+        return []
+    saved = save_rank_snapshots_from_matrix(league_id, standings, points_matrix, [IRON_MAN_BASE_GW, 38])
+    if saved != [IRON_MAN_BASE_GW, 38]:
+        raise RuntimeError(f"Iron Man rank snapshots not saved (got GWs {saved}); not writing a ledger without them")
+    rows = (
+        load_rank_trajectory(league_id)
+        .movement_table(IRON_MAN_BASE_GW, 38)
+        .rename(columns={"Start Rank": "Rank After GW19", "End Rank": "Current Rank"})
+    )
 
-    df = pd.DataFrame(rows).sort_values("Rank Gain", ascending=False).reset_index(drop=True)
-    positions = []
-    current_pos = 1
-    for i, row in df.iterrows():
-        if i == 0:
-            positions.append(current_pos)
-        elif row["Rank Gain"] == df.loc[i - 1, "Rank Gain"]:
-            positions.append(current_pos)
-        else:
-            current_pos = i + 1
-            positions.append(current_pos)
-    df.insert(0, "Position", positions)
+    df = rows.sort_values(["Rank Gain", "Current Rank"], ascending=[False, True]).reset_index(drop=True)
+    df = insert_position(df, ["Rank Gain"])
 
     return _ranked_award_entries(
         df,
@@ -367,65 +251,34 @@ def _iron_man_entries(league_id: int) -> List[Dict[str, Any]]:
     )
 
 
-def _lps_entries(league_id: int) -> List[Dict[str, Any]]:
-    standings = fetch_all_league_standings(league_id)
-    idx_by_entry = {int(row["entry"]): row for row in standings}
-    survivors = set(idx_by_entry)
-    elimination_log: Dict[int, List[Dict[str, Any]]] = {}
-
-    for gw in range(1, 39):
-        n_elim = elimination_schedule(gw)
-        if n_elim == 0 or len(survivors) <= 1:
-            elimination_log[gw] = []
-            continue
+def _lps_log(
+    league_id: int, standings: List[Dict[str, Any]], points_matrix: SeasonPointsMatrix
+) -> Dict[str, Any]:
+    """
+    The stored LPS log as the LPS award stage reads it, so the stage is
+    reused only while the log is unchanged. Raises once GW38 is final but
+    the log cannot reach it (e.g. tie-break picks missing from an offline
+    store), rather than writing a ledger without LPS.
+    """
+    entry_ids = [int(row["entry"]) for row in standings]
+    through_gw = update_lps_log(league_id, 38, standings, points_matrix)
+    if through_gw < 38:
+        if season_clock().is_final(38):
+            raise RuntimeError(f"LPS elimination log stops at GW{through_gw}; not writing a ledger without LPS")
+        print(f"⚠️ LPS elimination log runs through GW{through_gw}; LPS awards follow after GW38")
+    return {
+        "through_gw": through_gw,
+        "eliminations": {gw: lps_eliminations(league_id, gw) for gw in (37, 38) if gw <= through_gw},
+        "survivors": lps_survivors(league_id, through_gw, entry_ids),
+    }
 
-        rows = []
-        for entry_id in survivors:
-            picks = fetch_entry_event_picks(entry_id, gw)
-            points = compute_net_points(picks)
-            standing = idx_by_entry.get(entry_id, {})
-            rows.append(
-                {
-                    "entry": entry_id,
-                    "Manager": standing.get("player_name", ""),
-                    "Team": standing.get("entry_name", ""),
-                    "OverallRank": int(standing.get("rank", 10**9)),
-                    "OverallPoints": int(standing.get("total", 0)),
-                    "RawPoints": int(points["raw_points"]),
-                    "MinusPoints": int(points["minus_points"]),
-                    "NetPoints": int(points["net_points"]),
-                }
-            )
 
-        df = pd.DataFrame(rows).sort_values(
-            by=["NetPoints", "OverallRank", "MinusPoints"],
-            ascending=[True, True, False],
-        ).reset_index(drop=True)
-
-        threshold = df.iloc[n_elim - 1]["NetPoints"] if n_elim < len(df) else df.iloc[-1]["NetPoints"]
-        bottom_block = df[df["NetPoints"] <= threshold].copy()
-        strict_out = bottom_block[bottom_block["NetPoints"] < bottom_block["NetPoints"].max()].copy()
-        remaining_slots = max(0, n_elim - len(strict_out))
-        tied_group = bottom_block[bottom_block["NetPoints"] == bottom_block["NetPoints"].max()].copy()
-
-        eliminated_rows = [row for _, row in strict_out.iterrows()]
-        if remaining_slots > 0 and len(tied_group) > 0:
-            tied_group = tied_group.sort_values(
-                by=["OverallRank", "MinusPoints"],
-                ascending=[False, False],
-            ).reset_index(drop=True)
-            if remaining_slots < len(tied_group):
-                tied_group = pd.DataFrame(coin_toss_seeded(list(tied_group.to_dict("records")), gw))
-            eliminated_rows.extend([tied_group.iloc[i] for i in range(min(remaining_slots, len(tied_group)))])
-
-        eliminated_entries = []
-        for row in eliminated_rows:
-            entry_id = int(row["entry"])
-            if entry_id not in survivors:
-                continue
-            survivors.remove(entry_id)
-            eliminated_entries.append(dict(row))
-        elimination_log[gw] = eliminated_entries
+def _lps_entries(standings: List[Dict[str, Any]], lps_log: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if lps_log["through_gw"] < 38:
+        return []
+    idx_by_entry = {int(row["entry"]): row for row in standings}
+    elimination_log = lps_log["eliminations"]
+    survivors = lps_log["survivors"]
 
     entries = []
     third_last = elimination_log.get(37, [])
@@ -474,50 +327,50 @@ def _lps_entries(league_id: int) -> List[Dict[str, Any]]:
     return entries
 
 
-def build_winners_ledger(league_id: int = LEAGUE_ID) -> Dict[str, Any]:
-    entries: List[Dict[str, Any]] = []
-    entries.extend(_overall_entries(league_id))
-    entries.extend(_gameweek_slammer_entries(league_id))
-    entries.extend(_iron_man_entries(league_id))
-    entries.extend(_lps_entries(league_id))
-
-    wildcard_df = wildcard_wizard_table(league_id, 38)
-    if not wildcard_df.empty:
-        entries.extend(
-            _ranked_award_entries(
-                wildcard_df,
-                "Wildcard Wizard",
-                ["wildcard_wizard"],
-                "Wildcard Wizard",
-                lambda row: f"{row['Gameweek']}, {row['Points']} points",
-            )
-        )
+def _wildcard_wizard_entries(
+    standings: List[Dict[str, Any]], histories: Dict[int, Dict[str, Any]], points_matrix: SeasonPointsMatrix
+) -> List[Dict[str, Any]]:
+    wildcard_df = wildcard_wizard_frame(build_wildcard_wizard_rows(standings, histories, points_matrix, 38))
+    if wildcard_df.empty:
+        return []
+    return _ranked_award_entries(
+        wildcard_df,
+        "Wildcard Wizard",
+        ["wildcard_wizard"],
+        "Wildcard Wizard",
+        lambda row: f"{row['Gameweek']}, {row['Points']} points",
+    )
 
-    late_surge_df = late_surge_table(league_id, 38)
-    if not late_surge_df.empty:
-        entries.extend(
-            _ranked_award_entries(
-                late_surge_df,
-                "Late Surge",
-                ["late_surge"],
-                "Late Surge",
-                lambda row: f"{row['Total Points']} points from GW34-GW38",
-            )
-        )
 
-    everest_df = everest_table(league_id, 38)
-    if not everest_df.empty:
-        entries.extend(
-            _ranked_award_entries(
-                everest_df,
-                "Everest Award",
-                ["everest"],
-                "Everest Award",
-                lambda row: f"{row['Gameweek']}, {row['Net Points']} net points without chips",
-            )
-        )
+def _late_surge_entries(standings: List[Dict[str, Any]], points_matrix: SeasonPointsMatrix) -> List[Dict[str, Any]]:
+    late_surge_df = late_surge_frame(build_late_surge_rows(standings, points_matrix, 38))
+    if late_surge_df.empty:
+        return []
+    return _ranked_award_entries(
+        late_surge_df,
+        "Late Surge",
+        ["late_surge"],
+        "Late Surge",
+        lambda row: f"{row['Total Points']} points from GW34-GW38",
+    )
 
-    for row in knockout_cup_rows(league_id):
+
+def _everest_entries(standings: List[Dict[str, Any]], histories: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    everest_df = everest_frame(build_everest_rows(standings, histories, 38))
+    if everest_df.empty:
+        return []
+    return _ranked_award_entries(
+        everest_df,
+        "Everest Award",
+        ["everest"],
+        "Everest Award",
+        lambda row: f"{row['Gameweek']}, {row['Net Points']} net points without chips",
+    )
+
+
+def _knockout_cup_entries(cup_matches: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    entries = []
+    for row in build_knockout_cup_rows(cup_matches):
         payout_key = {
             "Winner": "knockout_winner",
             "Runner-up": "knockout_runner_up",
@@ -537,26 +390,141 @@ def build_winners_ledger(league_id: int = LEAGUE_ID) -> Dict[str, Any]:
                 "Knockout Cup",
             )
         )
+    return entries
+
+
+# Award stages in ledger order. Each is listed with the shared inputs it reads.
+AWARD_STAGES = [
+    ("overall", _overall_entries, ("standings",)),
+    ("gameweek_slammers", _gameweek_slammer_entries, ("standings", "points_matrix")),
+    ("iron_man", _iron_man_entries, ("league_id", "standings", "points_matrix", "final_gws")),
+    ("last_person_standing", _lps_entries, ("standings", "lps_log")),
+    ("wildcard_wizard", _wildcard_wizard_entries, ("standings", "histories", "points_matrix")),
+    ("late_surge", _late_surge_entries, ("standings", "points_matrix")),
+    ("everest", _everest_entries, ("standings", "histories")),
+    ("knockout_cup", _knockout_cup_entries, ("cup_matches",)),
+]
+
+
+class StageOutput(NamedTuple):
+    input_hash: str
+    entries: List[Dict[str, Any]]
+    recomputed: bool
+
+
+def _previous_stage_outputs(ledger: Dict[str, Any]) -> Dict[str, StageOutput]:
+    """
+    Split a saved ledger's entries back into its award stages. Entries are
+    stored in stage order, and `stages` records how many each produced.
+    """
+    outputs: Dict[str, StageOutput] = {}
+    entries = ledger.get("entries", [])
+    offset = 0
+    for name, meta in (ledger.get("stages") or {}).items():
+        count = int(meta.get("entries", 0))
+        outputs[name] = StageOutput(meta.get("input_hash", ""), entries[offset:offset + count], False)
+        offset += count
+    if offset != len(entries):
+        # Hand-edited or pre-incremental ledger: nothing can be reused safely.
+        return {}
+    return outputs
+
+
+def _incremental(
+    name: str, fn: Callable[..., List[Dict[str, Any]]], previous: Dict[str, StageOutput]
+) -> Callable[..., StageOutput]:
+    """
+    Wrap an award stage so it reuses the previous ledger's entries when the
+    hash of its inputs (plus the payout table) is unchanged.
+    """
+    def run(**inputs: Any) -> StageOutput:
+        input_hash = content_hash(name, PAYOUTS, IRON_MAN_BASE_GW, inputs)
+        cached = previous.get(name)
+        if cached is not None and cached.input_hash == input_hash:
+            return cached
+        return StageOutput(input_hash, fn(**inputs), True)
+
+    return run
+
+
+def _ledger_stages(league_id: int, previous: Dict[str, StageOutput]) -> List[Stage]:
+    """
+    Shared inputs are fetched once by their own stages; every award stage
+    depends only on the inputs it reads, so independent awards run together.
+    """
+    def fetch_histories(standings: List[Dict[str, Any]]) -> BatchResult:
+        return fetch_entry_history_many([row["entry"] for row in standings])
+
+    def build_matrix(standings: List[Dict[str, Any]], history_batch: BatchResult) -> SeasonPointsMatrix:
+        # Every points award would be paid around the gap, so stop here.
+        if history_batch.failed:
+            raise RuntimeError(
+                f"No history for {len(history_batch.failed)} manager(s) {sorted(history_batch.failed)}; "
+                "not writing a ledger without them"
+            )
+        entry_ids = [int(row["entry"]) for row in standings]
+        return build_points_matrix(entry_ids, history_batch.results, history_batch.failed)
+
+    stages = [
+        Stage("league_id", lambda: league_id),
+        Stage("standings", lambda: fetch_all_league_standings(league_id)),
+        Stage("history_batch", fetch_histories, ("standings",)),
+        Stage("histories", lambda history_batch: history_batch.results, ("history_batch",)),
+        Stage("points_matrix", build_matrix, ("standings", "history_batch")),
+        Stage("cup_matches", lambda: fetch_knockout_matches(league_id)),
+        Stage("final_gws", lambda: [gw for gw in range(1, SEASON_GWS + 1) if season_clock().is_final(gw)]),
+        Stage("lps_log", _lps_log, ("league_id", "standings", "points_matrix")),
+    ]
+    stages.extend(Stage(name, _incremental(name, fn, previous), deps) for name, fn, deps in AWARD_STAGES)
+    return stages
+
+
+def build_winners_ledger(league_id: int = LEAGUE_ID, previous: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    `previous` is the last saved ledger; award stages whose inputs hash the
+    same as when it was built keep its entries instead of being recomputed.
+    """
+    started = time.perf_counter()
+    reusable = {}
+    if previous and previous.get("league_id") == league_id:
+        reusable = _previous_stage_outputs(previous)
+    results, timings = run_stages(_ledger_stages(league_id, reusable), max_workers=LEDGER_WORKERS)
+
+    entries: List[Dict[str, Any]] = []
+    stages: Dict[str, Dict[str, Any]] = {}
+    for name, _, _ in AWARD_STAGES:
+        output: StageOutput = results[name]
+        entries.extend(output.entries)
+        stages[name] = {"input_hash": output.input_hash, "entries": len(output.entries)}
 
     return {
-        "season": "2025-26",
+        "season": SEASON,
         "currency": "WC",
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "league_id": league_id,
+        "build_seconds": round(time.perf_counter() - started, 3),
+        "stage_timings": timings,
+        "stages": stages,
+        "recomputed_stages": [name for name, _, _ in AWARD_STAGES if results[name].recomputed],
         "entries": entries,
     }
 
 
-def save_winners_ledger(path: Path = LEDGER_PATH, league_id: int = LEAGUE_ID) -> Dict[str, Any]:
-    ledger = build_winners_ledger(league_id)
+def save_winners_ledger(
+    path: Path = LEDGER_PATH, league_id: int = LEAGUE_ID, full_rebuild: bool = False
+) -> Dict[str, Any]:
+    previous = None if full_rebuild or not path.exists() else load_winners_ledger(path)
+    ledger = build_winners_ledger(league_id, previous)
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(ledger, indent=2, ensure_ascii=False), encoding="utf-8")
+    if LEDGER_BACKEND == "sqlite":
+        ledger_store.save_ledger(ledger)
     return ledger
 
 
 def load_winners_ledger(path: Path = LEDGER_PATH) -> Dict[str, Any]:
     if not path.exists():
-        return {"season": "2025-26", "currency": "WC", "entries": []}
+        return {"season": SEASON, "currency": "WC", "entries": []}
     return json.loads(path.read_text(encoding="utf-8"))
 
 
@@ -581,12 +549,105 @@ def totals_dataframe(ledger: Dict[str, Any]) -> pd.DataFrame:
     return grouped
 
 
+def tally_version(path: Path = LEDGER_PATH, season: str = SEASON) -> str:
+    """
+    Cache key for the tally helpers below: changes whenever the ledger is
+    saved. With the SQLite backend, a ledger file that has never been loaded
+    into the store is imported first.
+    """
+    if LEDGER_BACKEND == "sqlite":
+        version = ledger_store.ledger_version(season)
+        if not version and path.exists():
+            ledger_store.save_ledger(load_winners_ledger(path))
+            version = ledger_store.ledger_version(season)
+        return version
+    return str(path.stat().st_mtime_ns) if path.exists() else ""
+
+
+def tally_totals(path: Path = LEDGER_PATH, season: str = SEASON) -> pd.DataFrame:
+    if LEDGER_BACKEND == "sqlite":
+        return ledger_store.season_totals(season)
+    return totals_dataframe(load_winners_ledger(path))
+
+
+def tally_entries(manager_team: str | None = None, path: Path = LEDGER_PATH, season: str = SEASON) -> pd.DataFrame:
+    """
+    Every ledger entry, or one manager-team's, sorted by manager-team, award, detail.
+    """
+    if LEDGER_BACKEND == "sqlite":
+        if manager_team is None:
+            return ledger_store.season_entries(season)
+        return ledger_store.manager_entries(season, manager_team)
+    df = ledger_dataframe(load_winners_ledger(path))
+    if manager_team is None:
+        return df
+    return df[df["manager_team"] == manager_team].reset_index(drop=True)
+
+
 def ledger_csv(df: pd.DataFrame) -> str:
     output = io.StringIO()
     df.to_csv(output, index=False, quoting=csv.QUOTE_MINIMAL)
     return output.getvalue()
 
 
+def statement_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One manager-team's entries with the columns shown on their statement.
+    """
+    return df.rename(
+        columns={
+            "award": "Award",
+            "detail": "Detail",
+            "position": "Position",
+            "wc": "WC Won",
+        }
+    )[["Award", "Detail", "Position", "WC Won"]]
+
+
+def statement_stem(manager_team: str) -> str:
+    return f"{manager_team.replace(' ', '_').replace('/', '-')}_ledger"
+
+
+def _render_statement(manager_team: str, df: pd.DataFrame) -> List[Tuple[str, str]]:
+    stem = statement_stem(manager_team)
+    return [
+        (f"{stem}.csv", ledger_csv(statement_frame(df))),
+        (f"{stem}.html", printable_ledger_html(manager_team, df, df["wc"].sum())),
+    ]
+
+
+def write_statements_zip(
+    target: Union[Path, IO[bytes]], entries: pd.DataFrame | None = None, workers: int = LEDGER_WORKERS
+) -> int:
+    """
+    Write every manager-team's CSV and printable HTML statement into one ZIP
+    at `target` (a path or a writable binary file). Statements are rendered
+    on a worker pool with at most 2 × workers in flight, and each is written
+    and released as soon as it is ready, so memory stays flat however many
+    managers there are. Returns the number of statements written.
+    """
+    entries = tally_entries() if entries is None else entries
+    written = 0
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive, ThreadPoolExecutor(
+        max_workers=max(1, workers)
+    ) as pool:
+        pending = deque()
+
+        def flush_one() -> None:
+            nonlocal written
+            for name, content in pending.popleft().result():
+                archive.writestr(name, content)
+            written += 1
+
+        for manager_team, df in entries.groupby("manager_team", sort=False):
+            pending.append(pool.submit(_render_statement, manager_team, df))
+            if len(pending) >= 2 * max(1, workers):
+                flush_one()
+        while pending:
+            flush_one()
+    return written
+
+
 def printable_ledger_html(manager_team: str, df: pd.DataFrame, total_wc: float) -> str:
     rows = "\n".join(
         f"<tr><td>{row['award']}</td><td>{row['detail']}</td><td>{row['position']}</td><td>{row['wc']} WC</td></tr>"